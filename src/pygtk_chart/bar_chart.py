@@ -562,7 +562,7 @@ class BarChart(chart.Chart):
         """
         label.begin_drawing()
         
-        rect = self.get_allocation()
+        rect = self._get_render_rect()
         rect = gtk.gdk.Rectangle(0, 0, rect.width, rect.height) #transform rect to context coordinates
         context.set_line_width(1)
                                     
@@ -595,7 +595,8 @@ class BarChart(chart.Chart):
             n = len(self._bars)
             minimum_width = rect.x + self._bar_padding + 100
             minimum_height = rect.y + self._padding + (n - 1) * self._bar_padding + n * 10
-        self.set_size_request(minimum_width, minimum_height)
+        if self._render_rect == None:
+            self.set_size_request(minimum_width, minimum_height)
         
     def draw_basics(self, context, rect):
         """
@@ -638,6 +639,7 @@ class BarChart(chart.Chart):
             bar.set_color(COLORS[len(self._bars) % len(COLORS)])
         self._bars.append(bar)
         bar.connect("appearance_changed", self._cb_appearance_changed)
+        self.queue_draw()
         
     #callbacks
     def _cb_motion_notify(self, widget, event):
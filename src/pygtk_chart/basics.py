@@ -27,6 +27,7 @@ __docformat__ = "epytext"
 import cairo
 import gtk
 import os
+import pango
 
 import pygtk_chart
 
@@ -45,6 +46,23 @@ def intersect_ranges(range_a, range_b):
     min_b, max_b = range_b
     return max(min_a, min_b), min(max_a, max_b)
     
+def merge_ranges(range_a, ranges):
+    """
+    Returns the smallest range that contains range_a and all ranges.
+    Ranges that are None are ignored.
+    
+    @type range_a: pair of numbers or None
+    @type ranges: list of pairs of numbers or None
+    """
+    for range_b in ranges:
+        if not range_b:
+            continue
+        if range_a == None:
+            range_a = range_b
+        else:
+            range_a = min(range_a[0], range_b[0]), max(range_a[1], range_b[1])
+    return range_a
+    
 def get_center(rect):
     """
     Find the center point of a rectangle.
@@ -119,6 +137,18 @@ def gdk_color_list_from_file(filename):
             result.append(gtk.gdk.color_parse(line))
     return result
 
+def get_font_description():
+    """
+    Returns the default font of gtk widgets. No widget is created to
+    look it up, so this also works without a display.
+    
+    @return: pango.FontDescription.
+    """
+    settings = gtk.settings_get_default()
+    if settings != None:
+        return pango.FontDescription(settings.get_property("gtk-font-name"))
+    return pango.FontDescription("Sans 10")
+
 def set_context_line_style(context, style):
     """
     The the line style for a context.
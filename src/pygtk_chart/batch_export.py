@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+#
+#       batch_export.py
+#
+#       Copyright 2009 Sven Festersen <sven@sven-festersen.de>
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+"""
+This module exports many charts at once. The charts are rendered in a
+pool of worker processes, so the export scales with the number of
+cores.
+
+Example:
+
+jobs = [(spec, "chart%d.png" % i, (800, 600), "png") for i, spec in enumerate(specs)]
+for filename, seconds, error in export_charts(jobs):
+    if error:
+        print filename, error
+
+Author: Sven Festersen (sven@sven-festersen.de)
+"""
+__docformat__ = "epytext"
+import time
+import traceback
+
+from pygtk_chart import workers
+from pygtk_chart.spec import chart_new_from_spec
+
+
+def export_chart(job):
+    """
+    Create and export a single chart. job is a tuple
+    (spec, filename, size, format), see export_charts for details.
+    Errors are not raised but returned.
+
+    @return: a (filename, seconds, error) tuple, error is None or
+    a string with the traceback.
+    """
+    spec, filename, size, format = job
+    start = time.time()
+    try:
+        chart = chart_new_from_spec(spec)
+        chart.export(filename, format, size)
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return filename, time.time() - start, error
+
+def export_charts(jobs, processes=None, chunksize=1):
+    """
+    Export a list of charts. Every job is a tuple
+    (spec, filename, size, format):
+     - spec is a chart specification or a function that returns a
+       chart (see spec.chart_new_from_spec), functions have to be
+       defined at module level so they can be pickled
+     - filename is the path of the output file
+     - size is a (width, height) pair
+     - format is one of the strings in chart.EXPORT_FORMATS.
+
+    The charts are rendered in a multiprocessing pool with processes
+    workers (default: number of cpus). If processes is 1 or a pool
+    cannot be started, the charts are exported one after another in
+    this process.
+
+    @type jobs: list of tuples (see above)
+    @param jobs: the charts to export
+    @type processes: int
+    @param processes: number of worker processes
+    @type chunksize: int
+    @param chunksize: number of jobs sent to a worker at once
+
+    @return: a list of (filename, seconds, error) tuples in the order
+    of jobs, error is None or a string with the traceback.
+    """
+    return workers.map_jobs(export_chart, jobs, processes, chunksize)
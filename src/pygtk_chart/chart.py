@@ -34,15 +34,22 @@ All colors that pygtkChart uses are gtk.gdk.Colors as used by PyGTK.
 Author: Sven Festersen (sven@sven-festersen.de)
 """
 __docformat__ = "epytext"
+import cStringIO
 import cairo
+import contextlib
 import gobject
 import gtk
+import hashlib
 import os
 import pango
 import pangocairo
 import pygtk
+import struct
+import sys
+import time
+import zlib
 
-from pygtk_chart.chart_object import ChartObject
+from pygtk_chart.chart_object import ChartObject, NotFingerprintable, update_fingerprint
 from pygtk_chart.basics import *
 from pygtk_chart import label
 
@@ -50,6 +57,10 @@ COLOR_AUTO = 0
 AREA_CIRCLE = 0
 AREA_RECTANGLE = 1
 CLICK_SENSITIVE_AREAS = []
+EXPORT_FORMATS = ["png", "svg", "pdf"]
+#png exports whose image surface would be larger than this (in bytes)
+#are rendered in tiles
+TILED_EXPORT_THRESHOLD = 64 * 1024 * 1024
 
 
 def init_sensitive_areas():
@@ -60,6 +71,48 @@ def add_sensitive_area(type, coords, data):
     global CLICK_SENSITIVE_AREAS
     CLICK_SENSITIVE_AREAS.append((type, coords, data))
     
+def get_all_sensitive_areas():
+    return CLICK_SENSITIVE_AREAS
+    
+def _png_chunk(type, data):
+    chunk = type + data
+    return struct.pack("!I", len(data)) + chunk + struct.pack("!I", zlib.crc32(chunk) & 0xffffffff)
+    
+def _png_rows_from_surface(surface, rows):
+    """
+    Converts the first rows rows of a cairo.FORMAT_RGB24 image surface
+    to png scanlines (filter type 0, RGB).
+    """
+    surface.flush()
+    width = surface.get_width()
+    stride = surface.get_stride()
+    data = surface.get_data()
+    if sys.byteorder == "little":
+        offsets = (2, 1, 0) #pixels are stored as BGRX
+    else:
+        offsets = (1, 2, 3) #pixels are stored as XRGB
+    scanlines = []
+    for row in xrange(rows):
+        pixels = bytearray(data[row * stride:row * stride + 4 * width])
+        rgb = bytearray(3 * width)
+        for channel, offset in enumerate(offsets):
+            rgb[channel::3] = pixels[offset::4]
+        scanlines.append("\x00")
+        scanlines.append(str(rgb))
+    return "".join(scanlines)
+    
+def create_context(surface):
+    """
+    Returns a context on surface. The context can draw pango layouts
+    and pixbufs, like the context gtk creates for exposes.
+    
+    @type surface: cairo.Surface
+    @param surface: The surface to draw on.
+    
+    @return: gtk.gdk.CairoContext.
+    """
+    return gtk.gdk.CairoContext(cairo.Context(surface))
+    
 def get_sensitive_areas(x, y):
     res = []
     global CLICK_SENSITIVE_AREAS
@@ -75,6 +128,86 @@ def get_sensitive_areas(x, y):
     return res
 
 
+class FrameScheduler:
+    """
+    This helper class limits the redraws of a chart to a target frame
+    rate. It is used by the Chart widget internally, use
+    Chart.set_frame_rate() to enable it.
+    
+    When the first change arrives after a frame, the chart is frozen
+    (see Chart.freeze_update) and a frame is scheduled with
+    gobject.timeout_add (or gobject.idle_add if the frame is already
+    due). All changes until then are coalesced and applied at once
+    when the frame is thawed.
+    """
+    def __init__(self, chart, fps):
+        self._chart = chart
+        self._fps = fps
+        self._interval = 1.0 / fps
+        self._source = None
+        self._deadline = 0
+        self._last_frame = 0
+        self._in_frame = False
+        self._frames = 0
+        self._coalesced = 0
+        self._dropped = 0
+        
+    def request_frame(self):
+        """
+        Make sure that a frame is scheduled for a change of the chart.
+        """
+        if self._in_frame: return
+        if self._source != None:
+            self._coalesced += 1
+            return
+        now = time.time()
+        self._deadline = max(now, self._last_frame + self._interval)
+        self._chart.freeze_update()
+        if self._deadline <= now:
+            self._source = gobject.idle_add(self._cb_frame)
+        else:
+            delay = int(1000 * (self._deadline - now))
+            self._source = gobject.timeout_add(delay, self._cb_frame)
+            
+    def cancel(self):
+        """
+        Apply pending changes immediately and remove the scheduled
+        frame.
+        """
+        if self._source != None:
+            gobject.source_remove(self._source)
+            self._cb_frame()
+        
+    def _cb_frame(self):
+        now = time.time()
+        #frames that could not be shown in time because the main loop
+        #was busy are counted as dropped
+        self._dropped += int((now - self._deadline) / self._interval)
+        self._source = None
+        self._last_frame = now
+        self._frames += 1
+        self._in_frame = True
+        try:
+            self._chart.thaw_update()
+        finally:
+            self._in_frame = False
+        return False
+        
+    def get_fps(self):
+        """
+        Returns the target frame rate.
+        """
+        return self._fps
+        
+    def get_statistics(self):
+        """
+        Returns a dict with the number of rendered 'frames', the number
+        of 'coalesced' updates and the number of 'dropped' frames.
+        """
+        return {"frames": self._frames, "coalesced": self._coalesced,
+                "dropped": self._dropped}
+
+
 class Chart(gtk.DrawingArea):
     """
     This is the base class for all chart widgets.
@@ -99,6 +232,21 @@ class Chart(gtk.DrawingArea):
         gtk.DrawingArea.__init__(self)
         #private properties:
         self._padding = 16
+        self._cache_surface = None
+        self._cache_size = None
+        self._layers = {}
+        self._batch_level = 0
+        self._batch_objects = []
+        self._batch_layers = []
+        self._batch_redraw = False
+        self._frame_scheduler = None
+        self._render_rect = None
+        self._path_tolerance = 0
+        self._export_tolerance = 0.5
+        self._raster_dpi = None
+        self._export_cache = None
+        self._revision = 0
+        self._fingerprint = None
         #objects needed for every chart:
         self.background = Background()
         self.background.connect("appearance-changed", self._cb_appearance_changed)
@@ -121,11 +269,128 @@ class Chart(gtk.DrawingArea):
             self._padding = value
         else:
             raise AttributeError, "Property %s does not exist." % property.name
+        self._revision += 1
+            
+    def get_revision(self):
+        """
+        Returns the revision of the chart. The revision is increased
+        every time the chart or an object on it changes, so comparing
+        it to an older revision tells whether the chart has to be
+        rendered again.
+        
+        @return: int.
+        """
+        return self._revision
+        
+    def _invalidate_cache(self):
+        """
+        Drop the offscreen surface the chart is painted from. The chart
+        will be rendered again on the next expose_event.
+        """
+        self._cache_surface = None
+        self._layers = {}
+        
+    def _invalidate_layers(self, names):
+        """
+        Drop the cached surfaces of some layers of the chart and
+        schedule a redraw. All other layers are only composited again.
+        
+        @type names: list of strings
+        @param names: The names of the layers to render again.
+        """
+        self._revision += 1
+        if self._frame_scheduler != None:
+            self._frame_scheduler.request_frame()
+        if self._batch_level > 0:
+            self._batch_layers += names
+            return
+        self._cache_surface = None
+        for name in names:
+            if name in self._layers:
+                del self._layers[name]
+        gtk.DrawingArea.queue_draw(self)
+        
+    def queue_draw(self):
+        """
+        Invalidate the cached rendering of the chart and schedule a
+        redraw of the widget.
+        """
+        self._revision += 1
+        if self._frame_scheduler != None:
+            self._frame_scheduler.request_frame()
+        if self._batch_level > 0:
+            self._batch_redraw = True
+            return
+        self._invalidate_cache()
+        gtk.DrawingArea.queue_draw(self)
+        
+    def freeze_update(self):
+        """
+        Defer the handling of appearance changes, range calculations
+        and redraws until thaw_update() is called. Calls may be nested,
+        the deferred updates are applied once when the outermost
+        freeze_update() is thawed.
+        """
+        self._batch_level += 1
+        
+    def thaw_update(self):
+        """
+        Apply the updates that were deferred since the matching call
+        to freeze_update().
+        """
+        self._batch_level -= 1
+        if self._batch_level > 0: return
+        objects = self._batch_objects
+        layers = self._batch_layers
+        redraw = self._batch_redraw
+        self._batch_objects = []
+        self._batch_layers = []
+        self._batch_redraw = False
+        if redraw:
+            self.queue_draw()
+            return
+        for object in objects:
+            self._do_appearance_changed(object)
+        if layers:
+            self._invalidate_layers(layers)
+            
+    @contextlib.contextmanager
+    def batch_update(self):
+        """
+        A context manager that wraps freeze_update() and
+        thaw_update(). Use it to change many objects of the chart at
+        once:
+        
+        with chart.batch_update():
+            for graph in graphs:
+                chart.add_graph(graph)
+        
+        The chart is updated and redrawn once when the block is left.
+        """
+        self.freeze_update()
+        try:
+            yield self
+        finally:
+            self.thaw_update()
         
     def _cb_appearance_changed(self, object):
         """
-        This method is called after the appearance of an object changed
-        and forces a redraw.
+        This method is called after the appearance of an object
+        changed. The change is handled by _do_appearance_changed or
+        deferred if the chart is frozen.
+        """
+        self._revision += 1
+        if self._frame_scheduler != None:
+            self._frame_scheduler.request_frame()
+        if self._batch_level > 0:
+            if object not in self._batch_objects:
+                self._batch_objects.append(object)
+            return
+        self._do_appearance_changed(object)
+        
+    def _do_appearance_changed(self, object):
+        """
+        Handle the appearance change of an object. This forces a redraw.
         """
         self.queue_draw()
         
@@ -146,12 +411,68 @@ class Chart(gtk.DrawingArea):
         @param event: The event.
         """
         self.context = widget.window.cairo_create()
+        rect = self.get_allocation()
+        size = (rect.width, rect.height)
+        if self._cache_surface == None or self._cache_size != size:
+            #the chart is rendered to an offscreen surface only if
+            #something changed, other exposes are painted from the cache
+            target = self.context.get_target()
+            self._cache_surface = target.create_similar(cairo.CONTENT_COLOR_ALPHA, rect.width, rect.height)
+            self._cache_size = size
+            context = create_context(self._cache_surface)
+            self._draw_cache(context)
         self.context.rectangle(event.area.x, event.area.y, \
                                 event.area.width, event.area.height)
         self.context.clip()
-        self.draw(self.context)
+        self.context.set_source_surface(self._cache_surface, 0, 0)
+        self.context.paint()
         return False
         
+    def _draw_cache(self, context):
+        """
+        Render the chart to the offscreen cache surface.
+        
+        @type context: cairo.Context
+        @param context: A context on the cache surface.
+        """
+        self.draw(context)
+        
+    def _draw_layer(self, context, rect, name, draw_function, *args):
+        """
+        Paint the layer called name to context. If the layer is not
+        cached, it is rendered to its own surface first by calling
+        draw_function(layer_context, *args). The sensitive areas and
+        the areas of the labels that were added while rendering the
+        layer are cached with it. If the layer is painted from the
+        cache, they are added again, so labels drawn on other layers
+        avoid the cached ones.
+        
+        @type context: cairo.Context
+        @param context: The context to draw on.
+        @type rect: gtk.gdk.Rectangle
+        @param rect: A rectangle representing the charts area.
+        @type name: string
+        @param name: The name of the layer.
+        @param draw_function: The function that draws the layer.
+        """
+        if name in self._layers:
+            surface, areas, label_areas = self._layers[name]
+            CLICK_SENSITIVE_AREAS.extend(areas)
+            for area in label_areas:
+                label.register_label(area)
+        else:
+            target = context.get_target()
+            surface = target.create_similar(cairo.CONTENT_COLOR_ALPHA, rect.width, rect.height)
+            layer_context = create_context(surface)
+            layer_context.set_line_width(1)
+            first_area = len(CLICK_SENSITIVE_AREAS)
+            first_label = len(label.get_registered_labels())
+            draw_function(layer_context, *args)
+            label_areas = [label.LabelArea(l.get_allocation()) for l in label.get_registered_labels()[first_label:]]
+            self._layers[name] = (surface, CLICK_SENSITIVE_AREAS[first_area:], label_areas)
+        context.set_source_surface(surface, 0, 0)
+        context.paint()
+        
     def draw_basics(self, context, rect):
         """
         Draw basic things that every plot has (background, title, ...).
@@ -181,64 +502,268 @@ class Chart(gtk.DrawingArea):
         @type context: cairo.Context
         @param context: The context to draw on.
         """
-        rect = self.get_allocation()
+        rect = self._get_render_rect()
         rect = gtk.gdk.Rectangle(0, 0, rect.width, rect.height) #transform rect to context coordinates
         context.set_line_width(1)
         rect = self.draw_basics(context, rect)
         
-    def export_svg(self, filename, size=None):
+    def render(self, context, width, height, tolerance=0, raster_dpi=None):
+        """
+        Draw the chart with the given size to a cairo context. This
+        does not need a realized widget and does not touch the
+        allocation or the size request of the widget, so it can be
+        used to render charts that are not shown on screen.
+        
+        If tolerance is greater than 0, lines are simplified before
+        they are drawn: points are removed as long as the line does
+        not move by more than tolerance px.
+        
+        If raster_dpi is not None, dense data (e.g. the graphs of a
+        line chart) is drawn to an image with that resolution, which
+        is then painted on context. Everything else stays vector
+        graphics. Charts without such data ignore raster_dpi.
+        
+        The click sensitive areas of the widget on screen are not
+        changed by rendering.
+        
+        @type context: gtk.gdk.CairoContext
+        @param context: The context to draw on.
+        @type width: int
+        @param width: The width of the chart in px.
+        @type height: int
+        @param height: The height of the chart in px.
+        @type tolerance: float
+        @param tolerance: The simplification tolerance in px.
+        @type raster_dpi: float
+        @param raster_dpi: The resolution of rasterized data.
+        """
+        global CLICK_SENSITIVE_AREAS
+        old_state = self._render_rect, self._path_tolerance, self._raster_dpi
+        old_areas = CLICK_SENSITIVE_AREAS
+        self._render_rect = gtk.gdk.Rectangle(0, 0, width, height)
+        self._path_tolerance = tolerance
+        self._raster_dpi = raster_dpi
+        try:
+            self.draw(context)
+        finally:
+            #the areas belong to the rendered size, not to the widget
+            CLICK_SENSITIVE_AREAS = old_areas
+            self._render_rect, self._path_tolerance, self._raster_dpi = old_state
+            
+    def render_to_surface(self, surface, width, height, tolerance=0, raster_dpi=None):
+        """
+        Draw the chart with the given size to a cairo surface. See
+        L{render} for details.
+        
+        @type surface: cairo.Surface
+        @param surface: The surface to draw on.
+        @type width: int
+        @param width: The width of the chart in px.
+        @type height: int
+        @param height: The height of the chart in px.
+        @type tolerance: float
+        @param tolerance: The simplification tolerance in px.
+        @type raster_dpi: float
+        @param raster_dpi: The resolution of rasterized data.
+        """
+        context = create_context(surface)
+        self.render(context, width, height, tolerance, raster_dpi)
+        
+    def _get_render_rect(self):
+        """
+        Returns the rectangle the chart is drawn to: the size given to
+        render() or the allocation of the widget.
+        
+        @return: gtk.gdk.Rectangle.
+        """
+        if self._render_rect != None:
+            return self._render_rect
+        return self.get_allocation()
+        
+    def _get_export_size(self, size):
+        if size is None:
+            rect = self.get_allocation()
+            return rect.width, rect.height
+        return size
+        
+    def export_svg(self, filename, size=None, raster_dpi=None):
         """
         Saves the contents of the widget to svg file. The size of the image
-        will be the size of the widget.
+        will be the size of the widget. Lines are simplified to the
+        export tolerance (see set_export_tolerance).
         
-        @type filename: string
-        @param filename: The path to the file where you want the chart to be saved.
+        If raster_dpi is given, dense data like the graphs of a line
+        chart is embedded as an image with that resolution, while
+        axes, grid, labels, title and legend stay vector graphics.
+        
+        @type filename: string or file object
+        @param filename: The path to the file where you want the chart to
+        be saved or a writable file object.
         @type size: tuple
         @param size: Optional parameter to give the desired height and width of the image.
+        @type raster_dpi: float
+        @param raster_dpi: Optional resolution to rasterize dense data with.
         """
-        if size is None:
-            rect = self.get_allocation()
-            width = rect.width
-            height = rect.height
-        else:
-            width, height = size
-            old_alloc = self.get_allocation
-            self.get_allocation = lambda: gtk.gdk.Rectangle(0, 0, width, height)
+        self._export(filename, "svg", size, self._export_svg,
+                        tolerance=self._export_tolerance, raster_dpi=raster_dpi)
+        
+    def _export_svg(self, filename, width, height, tolerance, raster_dpi):
         surface = cairo.SVGSurface(filename, width, height)
-        ctx = cairo.Context(surface)
-        context = pangocairo.CairoContext(ctx)
-        self.draw(context)
+        self.render_to_surface(surface, width, height, tolerance, raster_dpi)
         surface.finish()
-        if size is not None:
-            self.get_allocation = old_alloc
         
-    def export_png(self, filename, size=None):
+    def export_pdf(self, filename, size=None, raster_dpi=None):
+        """
+        Saves the contents of the widget to pdf file. The size of the
+        page will be the size of the widget. Lines are simplified to the
+        export tolerance (see set_export_tolerance).
+        
+        If raster_dpi is given, dense data like the graphs of a line
+        chart is embedded as an image with that resolution, while
+        axes, grid, labels, title and legend stay vector graphics.
+        
+        @type filename: string or file object
+        @param filename: The path to the file where you want the chart to
+        be saved or a writable file object.
+        @type size: tuple
+        @param size: Optional parameter to give the desired height and width of the image.
+        @type raster_dpi: float
+        @param raster_dpi: Optional resolution to rasterize dense data with.
+        """
+        self._export(filename, "pdf", size, self._export_pdf,
+                        tolerance=self._export_tolerance, raster_dpi=raster_dpi)
+        
+    def _export_pdf(self, filename, width, height, tolerance, raster_dpi):
+        surface = cairo.PDFSurface(filename, width, height)
+        self.render_to_surface(surface, width, height, tolerance, raster_dpi)
+        surface.finish()
+        
+    def export_png(self, filename, size=None, tile_height=None):
         """
         Saves the contents of the widget to png file. The size of the image
         will be the size of the widget.
         
-        @type filename: string
-        @param filename: The path to the file where you want the chart to be saved.
+        Large images are rendered in horizontal tiles of tile_height
+        rows that are compressed and written to the file one after
+        another, so the memory needed only depends on the tile size.
+        If tile_height is None, tiles are used if the image would need
+        more than TILED_EXPORT_THRESHOLD bytes. Tiled images have no
+        alpha channel.
+        
+        @type filename: string or file object
+        @param filename: The path to the file where you want the chart to
+        be saved or a writable file object.
         @type size: tuple
         @param size: Optional parameter to give the desired height and width of the image.
+        @type tile_height: int
+        @param tile_height: Optional height of the tiles in px.
         """
-        if size is None:
-            rect = self.get_allocation()
-            width = rect.width
-            height = rect.height
+        self._export(filename, "png", size, self._export_png, tile_height=tile_height)
+        
+    def _export_png(self, filename, width, height, tile_height):
+        if tile_height == None and 4 * width * height > TILED_EXPORT_THRESHOLD:
+            tile_height = max(1, TILED_EXPORT_THRESHOLD / (4 * width))
+        if tile_height == None:
+            surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
+            self.render_to_surface(surface, width, height)
+            surface.write_to_png(filename)
+        elif type(filename) in (str, unicode):
+            f = open(filename, "wb")
+            try:
+                self._export_png_tiled(f, width, height, tile_height)
+            finally:
+                f.close()
         else:
-            width, height = size
-            old_alloc = self.get_allocation
-            self.get_allocation = lambda: gtk.gdk.Rectangle(0, 0, width, height)
-        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, width, height)
-        ctx = cairo.Context(surface)
-        context = pangocairo.CairoContext(ctx)
-        self.set_size_request(width, height)
-        self.draw(context)
-        surface.write_to_png(filename)
-        if size is not None:
-            self.get_allocation = old_alloc
+            self._export_png_tiled(filename, width, height, tile_height)
+            
+    def _export_png_tiled(self, f, width, height, tile_height):
+        """
+        Renders the chart tile by tile and streams the png to the file
+        object f. Every tile is rendered with a translated context,
+        cairo clips everything outside of the tile surface.
+        """
+        tile_height = min(tile_height, height)
+        surface = cairo.ImageSurface(cairo.FORMAT_RGB24, width, tile_height)
+        compressor = zlib.compressobj()
+        f.write("\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk("IHDR", struct.pack("!IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        for y in xrange(0, height, tile_height):
+            context = create_context(surface)
+            context.set_source_rgb(1, 1, 1)
+            context.paint()
+            context.translate(0, -y)
+            self.render(context, width, height)
+            del context
+            data = compressor.compress(_png_rows_from_surface(surface, min(tile_height, height - y)))
+            if data:
+                f.write(_png_chunk("IDAT", data))
+        f.write(_png_chunk("IDAT", compressor.flush()))
+        f.write(_png_chunk("IEND", ""))
+        
+    def _export(self, filename, format, size, export_function, **options):
+        """
+        Calls export_function(filename, width, height, **options). If
+        the chart has an export cache, the output is taken from the
+        cache or, if it is not cached yet, rendered to memory and
+        stored in the cache.
+        """
+        width, height = self._get_export_size(size)
+        if self._export_cache == None or self.get_fingerprint() == None:
+            export_function(filename, width, height, **options)
+            return
+        key = self._export_cache.get_key(self, format, (width, height), options)
+        data = self._export_cache.get(key)
+        if data == None:
+            buffer = cStringIO.StringIO()
+            export_function(buffer, width, height, **options)
+            data = buffer.getvalue()
+            self._export_cache.set(key, data)
+        if type(filename) in (str, unicode):
+            f = open(filename, "wb")
+            try:
+                f.write(data)
+            finally:
+                f.close()
+        else:
+            filename.write(data)
+            
+    def export(self, filename, format, size=None):
+        """
+        Saves the contents of the widget in the given format. See
+        export_png, export_svg and export_pdf for details.
         
+        @type filename: string or file object
+        @param filename: The path to the file where you want the chart to
+        be saved or a writable file object.
+        @type format: string
+        @param format: One of the strings in EXPORT_FORMATS.
+        @type size: tuple
+        @param size: Optional parameter to give the desired height and width of the image.
+        """
+        if format == "png":
+            self.export_png(filename, size)
+        elif format == "svg":
+            self.export_svg(filename, size)
+        elif format == "pdf":
+            self.export_pdf(filename, size)
+        else:
+            raise ValueError, "Unknown export format: %s" % format
+            
+    def export_data(self, format, size=None):
+        """
+        Returns the contents of the widget in the given format as a
+        string of bytes, no file is written.
+        
+        @type format: string
+        @param format: One of the strings in EXPORT_FORMATS.
+        @type size: tuple
+        @param size: Optional parameter to give the desired height and width of the image.
+        
+        @return: string.
+        """
+        buffer = cStringIO.StringIO()
+        self.export(buffer, format, size)
+        return buffer.getvalue()
         
     def set_padding(self, padding):
         """
@@ -257,6 +782,112 @@ class Chart(gtk.DrawingArea):
         @return: int in [0, 100].
         """
         return self.get_property("padding")
+        
+    def set_frame_rate(self, fps):
+        """
+        Limit the redraws of the chart to fps frames per second. All
+        data and appearance changes between two frames are coalesced
+        and rendered at once. Set fps to 0 (default) to redraw the
+        chart on every change.
+        
+        @param fps: the target frame rate
+        @type fps: number >= 0.
+        """
+        if self._frame_scheduler != None:
+            self._frame_scheduler.cancel()
+            self._frame_scheduler = None
+        if fps > 0:
+            self._frame_scheduler = FrameScheduler(self, fps)
+        
+    def get_frame_rate(self):
+        """
+        Returns the target frame rate of the chart or 0 if the frame
+        rate is not limited.
+        
+        @return: number.
+        """
+        if self._frame_scheduler == None:
+            return 0
+        return self._frame_scheduler.get_fps()
+        
+    def get_frame_statistics(self):
+        """
+        Returns a dict with the number of rendered 'frames', the number
+        of 'coalesced' updates and the number of 'dropped' frames since
+        the frame rate was set. Returns None if the frame rate is not
+        limited.
+        
+        @return: dict or None.
+        """
+        if self._frame_scheduler == None:
+            return None
+        return self._frame_scheduler.get_statistics()
+        
+    def get_fingerprint(self):
+        """
+        Returns a fingerprint of everything that changes the rendering
+        of the chart: its properties and the properties and data of all
+        objects on the chart. Charts with the same fingerprint look the
+        same. The fingerprint is only calculated again if the revision
+        of the chart changed.
+        
+        If the chart uses a callable that cannot be fingerprinted (see
+        chart_object.update_fingerprint), there is no fingerprint and
+        the chart is never taken from the export cache.
+        
+        @return: string (a hex digest) or None.
+        """
+        if self._fingerprint == None or self._fingerprint[0] != self._revision:
+            hasher = hashlib.sha1()
+            try:
+                update_fingerprint(hasher, self)
+                fingerprint = hasher.hexdigest()
+            except NotFingerprintable:
+                fingerprint = None
+            self._fingerprint = (self._revision, fingerprint)
+        return self._fingerprint[1]
+        
+    def set_export_cache(self, cache):
+        """
+        Set an export_cache.ExportCache for the chart. If the chart has
+        an export cache, exports of an unchanged chart with the same
+        size, format and options are taken from the cache instead of
+        being rendered again. Set cache to None (default) to disable
+        caching.
+        
+        @param cache: the cache to use
+        @type cache: export_cache.ExportCache or None.
+        """
+        self._export_cache = cache
+        
+    def get_export_cache(self):
+        """
+        Returns the export cache of the chart or None.
+        
+        @return: export_cache.ExportCache.
+        """
+        return self._export_cache
+        
+    def set_export_tolerance(self, tolerance):
+        """
+        Set the tolerance (in px) that lines are simplified to in svg
+        and pdf exports. Points are left out as long as the line does
+        not move by more than tolerance, so dense graphs give much
+        smaller files. Set it to 0 to export every point.
+        
+        @param tolerance: the tolerance in px
+        @type tolerance: float (default: 0.5).
+        """
+        self._export_tolerance = tolerance
+        
+    def get_export_tolerance(self):
+        """
+        Returns the tolerance lines are simplified to in svg and pdf
+        exports.
+        
+        @return: float.
+        """
+        return self._export_tolerance
     
         
 class Background(ChartObject):
@@ -484,6 +1115,7 @@ class Area(ChartObject):
         ChartObject.__init__(self)
         self._name = name
         self._value = value
+        self._value_revision = 0
         self._label = title
         self._color = COLOR_AUTO
         self._highlighted = False
@@ -513,6 +1145,7 @@ class Area(ChartObject):
             self._antialias = value
         elif property.name == "value":
             self._value = value
+            self._value_revision += 1
         elif property.name == "color":
             self._color = value
         elif property.name == "label":
@@ -539,6 +1172,15 @@ class Area(ChartObject):
         """
         return self.get_property("value")
         
+    def get_value_revision(self):
+        """
+        Returns the revision of the value of the area. It is increased
+        every time the value is set.
+        
+        @return: int.
+        """
+        return self._value_revision
+        
     def set_color(self, color):
         """
         Set the color of the area.
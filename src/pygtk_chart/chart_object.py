@@ -25,13 +25,148 @@ Author: Sven Festersen (sven@sven-festersen.de)
 """
 import cairo
 import gobject
+import gtk
+import hashlib
+import types
+
+
+class NotFingerprintable(Exception):
+    """
+    Raised by update_fingerprint if an object has a value whose state
+    cannot be hashed, e.g. a callable object or a bound method.
+    """
+    pass
+    
+
+def _fingerprint_code(code):
+    consts = []
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            consts.append(_fingerprint_code(const))
+        else:
+            consts.append(repr(const))
+    return hashlib.sha1(repr((code.co_code, consts, code.co_names))).hexdigest()
+    
+def _get_code_names(code):
+    """
+    Returns the names used by code and the code objects nested in it
+    (e.g. lambdas), sorted.
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.update(_get_code_names(const))
+    return sorted(names)
+    
+def _fingerprint_function(function, seen):
+    """
+    Hashes what a function computes: its code and constants, its
+    default arguments, the values in its closure and the values of
+    the module globals it uses. Modules are hashed by name.
+    """
+    if isinstance(function, (type, types.ClassType, types.BuiltinFunctionType)):
+        return "%s.%s" % (function.__module__, function.__name__)
+    if not isinstance(function, types.FunctionType):
+        raise NotFingerprintable, "Cannot fingerprint %r." % function
+    if id(function) in seen:
+        return "recursion"
+    seen = seen | set([id(function)])
+    defaults = [_fingerprint_value(value, seen) for value in function.func_defaults or ()]
+    cells = []
+    for cell in function.func_closure or ():
+        try:
+            cells.append(_fingerprint_value(cell.cell_contents, seen))
+        except ValueError:
+            #the cell is empty
+            cells.append(None)
+    globals = []
+    for name in _get_code_names(function.func_code):
+        if name not in function.func_globals:
+            #an attribute or a builtin
+            continue
+        value = function.func_globals[name]
+        if isinstance(value, types.ModuleType):
+            globals.append((name, "module:%s" % value.__name__))
+        else:
+            globals.append((name, _fingerprint_value(value, seen)))
+    state = (_fingerprint_code(function.func_code), defaults, cells, globals)
+    return "function:%s" % hashlib.sha1(repr(state)).hexdigest()
+
+def fingerprint_function(function):
+    """
+    Returns a string that only changes if what function computes
+    changes (see update_fingerprint). NotFingerprintable is raised if
+    function is a callable object or a bound method.
+    
+    @type function: a function
+    @param function: the function to fingerprint
+    
+    @return: string.
+    """
+    return _fingerprint_function(function, frozenset())
+
+def _fingerprint_value(value, seen=frozenset()):
+    if isinstance(value, gtk.gdk.Color):
+        return value.to_string()
+    elif isinstance(value, gtk.gdk.Pixbuf):
+        return hashlib.sha1(value.get_pixels()).hexdigest()
+    elif isinstance(value, ChartObject):
+        #referenced objects are hashed on their own
+        return type(value).__name__
+    elif callable(value):
+        return _fingerprint_function(value, seen)
+    return repr(value)
+    
+def _get_child_objects(value):
+    if isinstance(value, ChartObject):
+        return [value]
+    elif type(value) in (list, tuple):
+        return [v for v in value if isinstance(v, ChartObject)]
+    elif type(value) == dict:
+        return [value[k] for k in sorted(value.keys()) if isinstance(value[k], ChartObject)]
+    return []
+
+def update_fingerprint(hasher, object, seen=None):
+    """
+    Adds the state of object to the hashlib object hasher: the values
+    of its gobject properties, the state returned by its
+    _get_fingerprint_state method and the state of all ChartObjects
+    it contains. object can be a ChartObject or a chart widget. Two
+    objects that are drawn differently have different fingerprints.
+    Functions are hashed by their code, default arguments, closure and
+    the globals they use. NotFingerprintable is raised for other
+    callables.
+    
+    @type hasher: a hashlib hash object
+    @param hasher: the hash to update
+    @param object: the object to add to the hash.
+    """
+    if seen == None:
+        seen = set()
+    seen.add(id(object))
+    hasher.update("<%s" % type(object).__name__)
+    names = set()
+    for cls in type(object).__mro__:
+        names.update(cls.__dict__.get("__gproperties__", {}).keys())
+    for name in sorted(names):
+        hasher.update("%s=%s;" % (name, _fingerprint_value(object.get_property(name))))
+    if hasattr(object, "_get_fingerprint_state"):
+        hasher.update(repr(object._get_fingerprint_state()))
+    for name in sorted(object.__dict__.keys()):
+        for child in _get_child_objects(object.__dict__[name]):
+            if id(child) not in seen:
+                hasher.update(name)
+                update_fingerprint(hasher, child, seen)
+    hasher.update(">")
+    
 
 class ChartObject(gobject.GObject):
     """
     This is the base class for all things that can be drawn on a chart
     widget.
     It emits the signal 'appearance-changed' when it needs to be
-    redrawn.
+    redrawn. Every time the signal is emitted, the revision of the
+    object (see get_revision) is increased.
     
     Properties
     ==========
@@ -65,6 +200,7 @@ class ChartObject(gobject.GObject):
         gobject.GObject.__init__(self)
         self._show = True
         self._antialias = True
+        self._revision = 0
         
     def do_get_property(self, property):
         if property.name == "visible":
@@ -94,7 +230,7 @@ class ChartObject(gobject.GObject):
         """
         pass
         
-    def draw(self, context, rect, *args):
+    def draw(self, context, rect, *args, **kwargs):
         """
         This method is called by the parent Chart instance. It
         calls _do_draw.
@@ -108,7 +244,7 @@ class ChartObject(gobject.GObject):
         if self._show:
             if not self._antialias:
                 context.set_antialias(cairo.ANTIALIAS_NONE)
-            res = self._do_draw(context, rect, *args)
+            res = self._do_draw(context, rect, *args, **kwargs)
             context.set_antialias(cairo.ANTIALIAS_DEFAULT)
         return res
         
@@ -151,5 +287,26 @@ class ChartObject(gobject.GObject):
         """
         return self.get_property("visible")
         
+    def do_appearance_changed(self):
+        self._revision += 1
+        
+    def get_revision(self):
+        """
+        Returns the revision of the object. The revision is increased
+        every time the appearance of the object changes, so comparing
+        it to an older revision tells whether the object changed.
+        
+        @return: int.
+        """
+        return self._revision
+        
+    def _get_fingerprint_state(self):
+        """
+        Derived classes that store state that changes their rendering
+        outside of gobject properties (e.g. the data of a graph)
+        should return it here. See update_fingerprint.
+        """
+        return None
+        
 
 gobject.type_register(ChartObject)
@@ -0,0 +1,888 @@
+#!/usr/bin/env python
+#
+#       data_file.py
+#
+#       Copyright 2009 Sven Festersen <sven@sven-festersen.de>
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+"""
+This module reads the columns of data files. It is used by
+line_chart.graph_new_from_file.
+
+Data file format:
+The columns in the file have to be separated by tabs or one or more
+spaces. Everything after '#' is ignored (comment), empty lines are
+skipped.
+
+Files are read in chunks of CHUNK_SIZE bytes, so the memory needed
+for parsing does not depend on the size of the file. If numpy is
+installed, every chunk is parsed at once by numpy and the columns are
+returned as numpy arrays. Otherwise the lines are parsed one by one
+and the columns are returned as array.array('d') objects.
+
+Binary column files (raw little-endian float64/float32 values or 1-D
+.npy files) are not parsed but memory-mapped, see open_column and
+ColumnData. Series sampled at fixed intervals only need a column of y
+values, see RegularData.
+
+The parsed columns of text files can be cached in a directory (see
+the cache_dir parameter of read_columns). The cache entries are .npy
+files keyed by the path of the data file and the selected columns,
+the modification time and size of the file are stored with them. If
+the data file did not change, the columns are memory-mapped from the
+cache instead of parsing the file again; if it changed, the entry is
+replaced.
+
+Many files can be read at once in a pool of worker processes, see
+read_many_columns. The workers send the columns back as raw bytes,
+not as pickled lists of floats.
+
+Author: Sven Festersen (sven@sven-festersen.de)
+"""
+__docformat__ = "epytext"
+import array
+import ast
+import hashlib
+import math
+import mmap
+import os
+import struct
+import sys
+import traceback
+import warnings
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from pygtk_chart import workers
+
+CHUNK_SIZE = 4 * 1024 * 1024
+#number of values converted at once when iterating over columns
+BLOCK_SIZE = 65536
+DTYPES = {"float64": "<f8", "float32": "<f4"}
+STRUCT_FORMATS = {"<f8": "d", "<f4": "f"}
+#numpy warns if fromstring cannot parse the whole text, this is
+#detected and handled by _parse_lines_numpy
+warnings.filterwarnings("ignore", category=DeprecationWarning, module=__name__)
+
+
+def _clean_lines(lines):
+    """
+    Removes comments and empty lines. Every returned line ends with a
+    newline.
+    """
+    result = []
+    for line in lines:
+        if "#" in line:
+            line = line.split("#", 1)[0]
+        if not line.strip():
+            continue
+        if not line.endswith("\n"):
+            line += "\n"
+        result.append(line)
+    return result
+
+def _parse_lines_numpy(lines, columns):
+    """
+    Parses the lines with numpy. Returns None if the lines do not all
+    have the same number of fields or cannot be parsed by numpy, the
+    caller has to parse them line by line then.
+    """
+    text = "".join(lines)
+    chars = numpy.frombuffer(text, numpy.uint8)
+    space = (chars == 32) | (chars == 9) | (chars == 10) | (chars == 11) | (chars == 12) | (chars == 13)
+    #count the fields of every line: a field starts with a non-space
+    #character that follows a space character
+    starts = ~space
+    starts[1:] &= space[:-1]
+    fields = numpy.cumsum(starts)[chars == 10]
+    counts = numpy.diff(numpy.concatenate(([0], fields)))
+    n = counts[0]
+    if (counts != n).any():
+        return None
+    for col in columns:
+        if not -n <= col < n:
+            return None
+    values = numpy.fromstring(text, sep=" ")
+    if values.size != n * len(lines):
+        return None
+    values = values.reshape((len(lines), n))
+    return [values[:, col].copy() for col in columns]
+
+def _parse_lines(lines, columns):
+    result = [array.array("d") for col in columns]
+    for line in lines:
+        d = line.split()
+        for values, col in zip(result, columns):
+            values.append(float(d[col]))
+    return result
+
+def iter_column_chunks(f, columns, chunk_size=CHUNK_SIZE):
+    """
+    Reads the file object f in chunks of about chunk_size bytes and
+    yields the requested columns of every chunk.
+
+    @type f: file object
+    @param f: the data file
+    @type columns: list of ints
+    @param columns: the indices of the columns to read
+    @type chunk_size: int
+    @param chunk_size: the size of the chunks in bytes
+
+    @return: generator of lists of numpy arrays or array.arrays.
+    """
+    while True:
+        lines = f.readlines(chunk_size)
+        if not lines:
+            break
+        chunk = parse_lines(lines, columns)
+        if chunk != None:
+            yield chunk
+            
+def parse_lines(lines, columns):
+    """
+    Parses lines of a data file and returns the requested columns.
+    
+    @type lines: list of strings
+    @param lines: the lines to parse
+    @type columns: list of ints
+    @param columns: the indices of the columns to read
+    
+    @return: a list of numpy arrays or array.arrays, or None if there
+    are only comments and empty lines.
+    """
+    lines = _clean_lines(lines)
+    if not lines:
+        return None
+    chunk = None
+    if numpy != None:
+        chunk = _parse_lines_numpy(lines, columns)
+    if chunk == None:
+        chunk = _parse_lines(lines, columns)
+    return chunk
+
+def read_columns(filename, columns, chunk_size=CHUNK_SIZE, cache_dir=None):
+    """
+    Reads some columns of the data file filename.
+
+    @type filename: string
+    @param filename: path to the data file
+    @type columns: list of ints
+    @param columns: the indices of the columns to read
+    @type chunk_size: int
+    @param chunk_size: the size of the chunks the file is parsed in
+    @type cache_dir: string
+    @param cache_dir: optional directory to cache the parsed columns in
+
+    @return: a list of numpy arrays (if numpy is installed) or
+    array.arrays, one for every column in columns. Columns from the
+    cache are memory-mapped (see open_column).
+    """
+    if cache_dir != None:
+        key = _get_cache_key(filename, columns, False)
+        state = _get_file_state(filename)
+        cached = _load_cached_columns(cache_dir, key, len(columns), state)
+        if cached != None:
+            return cached[1]
+    f = open(filename, "r")
+    try:
+        chunks = list(iter_column_chunks(f, columns, chunk_size))
+    finally:
+        f.close()
+    values = [join_columns([chunk[i] for chunk in chunks]) for i in range(len(columns))]
+    if cache_dir != None:
+        _store_cached_columns(cache_dir, key, None, values, state)
+    return values
+
+def read_columns_with_header(filename, columns, chunk_size=CHUNK_SIZE, cache_dir=None):
+    """
+    Reads some columns of a data file whose first non-empty line is a
+    header with the names of the columns (it may start with '#').
+    The columns can be given by index or by name.
+    
+    @type filename: string
+    @param filename: path to the data file
+    @type columns: list of ints or strings
+    @param columns: the indices or names of the columns to read
+    @type chunk_size: int
+    @param chunk_size: the size of the chunks the file is parsed in
+    @type cache_dir: string
+    @param cache_dir: optional directory to cache the parsed columns in
+    
+    @return: a pair (names, values): the list of column names in the
+    header and a list of numpy arrays or array.arrays, one for every
+    column in columns.
+    """
+    if cache_dir != None:
+        key = _get_cache_key(filename, columns, True)
+        state = _get_file_state(filename)
+        cached = _load_cached_columns(cache_dir, key, len(columns), state)
+        if cached != None:
+            return cached
+    f = open(filename, "r")
+    try:
+        names = []
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            line = line.strip().lstrip("#").strip()
+            if line:
+                names = line.split()
+                break
+        indices = []
+        for col in columns:
+            if type(col) in (str, unicode):
+                if col not in names:
+                    raise ValueError, "Unknown column: %s" % col
+                col = names.index(col)
+            indices.append(col)
+        chunks = list(iter_column_chunks(f, indices, chunk_size))
+    finally:
+        f.close()
+    values = [join_columns([chunk[i] for chunk in chunks]) for i in range(len(columns))]
+    if cache_dir != None:
+        _store_cached_columns(cache_dir, key, names, values, state)
+    return names, values
+    
+def _get_cache_key(filename, columns, header):
+    key = repr((os.path.abspath(filename), list(columns), header))
+    return hashlib.sha1(key).hexdigest()
+    
+def _get_file_state(filename):
+    """
+    Returns a string that changes if the file is modified.
+    """
+    stat = os.stat(filename)
+    return "%r %d" % (stat.st_mtime, stat.st_size)
+    
+def _get_cache_paths(cache_dir, key, n):
+    """
+    Returns the paths of the column files and of the meta file (state
+    of the data file and column names) of a cache entry.
+    """
+    paths = [os.path.join(cache_dir, "%s-%d.npy" % (key, i)) for i in range(n)]
+    return paths, os.path.join(cache_dir, "%s.meta" % key)
+    
+def _load_cached_columns(cache_dir, key, n, state):
+    """
+    Returns (names, columns) from the cache or None if the columns
+    are not cached or were cached from a different state of the data
+    file (see _get_file_state). names is None if the file has no
+    header.
+    """
+    paths, meta_path = _get_cache_paths(cache_dir, key, n)
+    try:
+        before = os.stat(meta_path)
+        f = open(meta_path, "r")
+        try:
+            lines = f.read().split("\n")
+        finally:
+            f.close()
+        if lines[0] != state:
+            return None
+        columns = [open_column(path) for path in paths]
+        #the entry must not have been replaced while it was opened
+        after = os.stat(meta_path)
+    except (IOError, OSError, ValueError):
+        return None
+    if before.st_ino != after.st_ino:
+        return None
+    return " ".join(lines[1:]).split(), columns
+        
+def _write_npy(f, column):
+    if numpy != None:
+        numpy.save(f, numpy.asarray(column, "<f8"))
+        return
+    header = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d,), }" % len(column)
+    #the data has to start at a multiple of 64 bytes
+    header += " " * (63 - (10 + len(header)) % 64) + "\n"
+    f.write("\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header)
+    column = array.array("d", column)
+    if sys.byteorder == "big":
+        column.byteswap()
+    column.tofile(f)
+    
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        #it does not exist (any more)
+        pass
+        
+def _store_cached_columns(cache_dir, key, names, values, state):
+    """
+    Stores the columns in the cache, replacing an older entry for the
+    same file and columns.
+    """
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    paths, meta_path = _get_cache_paths(cache_dir, key, len(values))
+    #without the meta file the old entry is not used any more
+    _remove_file(meta_path)
+    if len(values[0]) == 0:
+        #empty files cannot be memory-mapped
+        for path in paths:
+            _remove_file(path)
+        return
+    for path, column in zip(paths, values):
+        workers.write_atomically(cache_dir, os.path.basename(path), lambda f: _write_npy(f, column))
+    #the meta file is written last, it marks the entry as complete
+    meta = [state] + (names or [])
+    workers.write_atomically(cache_dir, os.path.basename(meta_path), lambda f: f.write("\n".join(meta)))
+
+def is_sorted(column):
+    """
+    Returns True if the values in column are in ascending order.
+    
+    @return: boolean.
+    """
+    if numpy != None and isinstance(column, numpy.ndarray):
+        return bool((column[1:] >= column[:-1]).all())
+    for start in xrange(0, len(column), BLOCK_SIZE):
+        block = column[max(0, start - 1):start + BLOCK_SIZE].tolist()
+        for a, b in zip(block, block[1:]):
+            if b < a:
+                return False
+    return True
+
+def sort_columns(values):
+    """
+    Sorts columns by the values in the first column, e.g. the x
+    column and the y columns of a data file. Rows with the same value
+    keep their order. If the first column is already sorted, the
+    columns are returned as they are.
+    
+    @type values: list of columns
+    @param values: the columns to sort
+    
+    @return: list of numpy arrays (if numpy is installed) or
+    array.arrays.
+    """
+    if not values or is_sorted(values[0]):
+        return values
+    if numpy != None:
+        order = numpy.argsort(numpy.asarray(values[0]), kind="mergesort")
+        return [numpy.asarray(column)[order] for column in values]
+    first = values[0].tolist()
+    order = sorted(xrange(len(first)), key=first.__getitem__)
+    result = []
+    for column in values:
+        column = column.tolist()
+        result.append(array.array("d", [column[i] for i in order]))
+    return result
+
+def join_columns(parts):
+    """
+    Concatenates parts of a column.
+    
+    @type parts: list of numpy arrays or array.arrays
+    @param parts: the parts to join
+    
+    @return: numpy array (if numpy is installed) or array.array.
+    """
+    if numpy != None:
+        if not parts:
+            return numpy.zeros(0)
+        return numpy.concatenate([numpy.asarray(part, numpy.float64) for part in parts])
+    result = array.array("d")
+    for part in parts:
+        result.extend(part)
+    return result
+
+
+class MappedColumn:
+    """
+    A column of float values in a memory-mapped binary file. It is
+    used by open_column if numpy is not installed. Values are only
+    read from the file when they are accessed, slices are views on
+    the same mapping.
+    """
+
+    def __init__(self, filename, dtype="<f8", offset=0, length=None, _mapping=None):
+        self.filename = filename
+        self.dtype = dtype
+        self._format = "<" + STRUCT_FORMATS[dtype]
+        self._itemsize = struct.calcsize(self._format)
+        self._offset = offset
+        if _mapping == None:
+            f = open(filename, "rb")
+            try:
+                if os.fstat(f.fileno()).st_size > 0:
+                    _mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    _mapping = ""
+            finally:
+                f.close()
+        self._mapping = _mapping
+        if length == None:
+            length = (len(_mapping) - offset) / self._itemsize
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if type(index) == slice:
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                raise ValueError, "MappedColumn slices cannot have a step."
+            return MappedColumn(self.filename, self.dtype,
+                                self._offset + start * self._itemsize,
+                                max(0, stop - start), self._mapping)
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError, "MappedColumn index out of range."
+        return struct.unpack_from(self._format, self._mapping,
+                                    self._offset + index * self._itemsize)[0]
+
+    def __iter__(self):
+        for start in xrange(0, self._length, BLOCK_SIZE):
+            for value in self[start:start + BLOCK_SIZE].tolist():
+                yield value
+
+    def tolist(self):
+        return list(struct.unpack_from("<%d%s" % (self._length, self._format[1]),
+                                        self._mapping, self._offset))
+
+    def describe(self):
+        return "%s:%d:%d:%s" % (self.filename, self._offset, self._length, self.dtype)
+
+
+def _read_npy_header(f):
+    """
+    Reads the header of a .npy file and returns (dtype, length,
+    offset of the data).
+    """
+    if f.read(6) != "\x93NUMPY":
+        raise ValueError, "Not a .npy file."
+    major, minor = struct.unpack("<BB", f.read(2))
+    if major == 1:
+        header_length = struct.unpack("<H", f.read(2))[0]
+    else:
+        header_length = struct.unpack("<I", f.read(4))[0]
+    header = ast.literal_eval(f.read(header_length))
+    if len(header["shape"]) != 1:
+        raise ValueError, "Only 1-dimensional .npy files are supported."
+    if header["descr"] not in STRUCT_FORMATS:
+        raise ValueError, "Unsupported data type: %s" % header["descr"]
+    return header["descr"], header["shape"][0], f.tell()
+
+def open_column(filename, dtype="float64"):
+    """
+    Memory-maps a binary column file. The file is either a 1-D .npy
+    file or contains raw little-endian values of type dtype. Nothing
+    is read from the file until the values are accessed.
+
+    @type filename: string
+    @param filename: path to the column file
+    @type dtype: string
+    @param dtype: 'float64' or 'float32', the type of the values in
+    raw files (ignored for .npy files)
+
+    @return: numpy.memmap (if numpy is installed) or MappedColumn.
+    """
+    if filename.endswith(".npy"):
+        if numpy != None:
+            column = numpy.load(filename, mmap_mode="r")
+            if column.ndim != 1:
+                raise ValueError, "Only 1-dimensional .npy files are supported."
+            return column
+        f = open(filename, "rb")
+        try:
+            descr, length, offset = _read_npy_header(f)
+        finally:
+            f.close()
+        return MappedColumn(filename, descr, offset, length)
+    if numpy != None:
+        return numpy.memmap(filename, dtype=DTYPES[dtype], mode="r")
+    return MappedColumn(filename, DTYPES[dtype])
+
+def _describe_column(column):
+    if isinstance(column, MappedColumn):
+        description = column.describe()
+    elif getattr(column, "filename", None) != None:
+        description = "%s:%s:%d" % (column.filename, getattr(column, "offset", 0), len(column))
+    else:
+        return hashlib.sha1(str(buffer(column))).hexdigest()
+    return "%s:%s" % (description, os.path.getmtime(column.filename))
+
+def _column_min_max(column):
+    if numpy != None and isinstance(column, numpy.ndarray):
+        return float(column.min()), float(column.max())
+    minimum, maximum = None, None
+    for start in xrange(0, len(column), BLOCK_SIZE):
+        block = column[start:start + BLOCK_SIZE].tolist()
+        if minimum == None:
+            minimum, maximum = min(block), max(block)
+        else:
+            minimum, maximum = min(minimum, min(block)), max(maximum, max(block))
+    return minimum, maximum
+
+
+class ColumnData:
+    """
+    A read-only sequence of (x, y) points that is backed by two
+    columns (numpy arrays, memory-mapped columns from open_column or
+    array.arrays) instead of a list of tuples. A line_chart.Graph
+    created with ColumnData draws directly from the columns.
+
+    If x_sorted is True, the x values have to be in ascending order.
+    The graph then only accesses the points in the visible x range
+    (see get_window), so only those pages of a memory-mapped file are
+    read.
+    """
+
+    def __init__(self, x, y, x_sorted=True):
+        if len(x) != len(y):
+            raise ValueError, "The columns have different lengths."
+        self._x = x
+        self._y = y
+        self._x_sorted = x_sorted
+        self._y_range = None
+
+    def __len__(self):
+        return len(self._x)
+
+    def __getitem__(self, index):
+        if type(index) == slice:
+            return ColumnData(self._x[index], self._y[index], self._x_sorted)
+        return float(self._x[index]), float(self._y[index])
+
+    def __iter__(self):
+        for start in xrange(0, len(self._x), BLOCK_SIZE):
+            xs = self._x[start:start + BLOCK_SIZE].tolist()
+            ys = self._y[start:start + BLOCK_SIZE].tolist()
+            for point in zip(xs, ys):
+                yield point
+
+    def __repr__(self):
+        return "ColumnData(%s, %s)" % (_describe_column(self._x), _describe_column(self._y))
+
+    def get_columns(self):
+        """
+        Returns the x and y columns.
+
+        @return: pair of columns.
+        """
+        return self._x, self._y
+
+    def get_sorted(self):
+        """
+        Returns the points sorted by x: self if the x values are
+        sorted, otherwise ColumnData with sorted copies of the columns
+        (see sort_columns).
+
+        @return: ColumnData.
+        """
+        if self._x_sorted:
+            return self
+        x, y = sort_columns([self._x, self._y])
+        return ColumnData(x, y)
+
+    def _bisect(self, value):
+        low, high = 0, len(self._x)
+        while low < high:
+            middle = (low + high) / 2
+            if self._x[middle] < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def get_window(self, xmin, xmax):
+        """
+        Returns the points with xmin <= x <= xmax as ColumnData. If
+        the x values are not sorted, all points are returned.
+
+        @return: ColumnData.
+        """
+        if not self._x_sorted:
+            return self
+        start = self._bisect(xmin)
+        end = self._bisect(xmax)
+        while end < len(self._x) and self._x[end] <= xmax:
+            end += 1
+        return self[start:end]
+
+    def get_x_range(self):
+        """
+        Returns the minimum and maximum x value or None if there are
+        no points.
+
+        @return: pair of floats.
+        """
+        if len(self._x) == 0:
+            return None
+        if self._x_sorted:
+            return float(self._x[0]), float(self._x[-1])
+        return _column_min_max(self._x)
+
+    def get_y_range(self):
+        """
+        Returns the minimum and maximum y value or None if there are
+        no points.
+
+        @return: pair of floats.
+        """
+        if len(self._y) == 0:
+            return None
+        if self._y_range == None:
+            #the columns cannot change, so they are only scanned once
+            self._y_range = _column_min_max(self._y)
+        return self._y_range
+
+    def get_index(self, x):
+        """
+        Returns the index of the point whose x value is closest to x
+        or None if there are no points.
+
+        @return: int.
+        """
+        n = len(self)
+        if n == 0:
+            return None
+        if not self._x_sorted:
+            distances = [abs(point[0] - x) for point in self]
+            return distances.index(min(distances))
+        i = self._bisect(x)
+        if i == n or (i > 0 and x - self[i - 1][0] <= self[i][0] - x):
+            i -= 1
+        return i
+
+    def get_value_at(self, x):
+        """
+        Returns the y value of the point whose x value is closest to x
+        or None if there are no points.
+
+        @return: float.
+        """
+        i = self.get_index(x)
+        if i == None:
+            return None
+        return float(self._y[i])
+
+
+class RegularData(ColumnData):
+    """
+    ColumnData for series sampled at fixed intervals: the x value of
+    the i-th point is x0 + i * dx, so only the y column is stored
+    (a numpy array, a memory-mapped column from open_column, an
+    array.array or a list). Finding the points in an x range or the
+    point at an x value is a calculation instead of a search.
+
+    Adding data to a graph with RegularData (Graph.add_data) converts
+    its data to a list of points.
+    """
+
+    def __init__(self, x0, dx, y, _first=0, _stride=1):
+        if dx <= 0:
+            raise ValueError, "dx has to be positive."
+        if type(y) in (list, tuple):
+            y = join_columns([y])
+        self._x0 = float(x0)
+        self._dx = float(dx)
+        #slices keep x0 and dx, so their x values are exactly the same
+        self._first = _first
+        self._stride = _stride
+        self._y = y
+        self._x_sorted = True
+        self._y_range = None
+
+    def __len__(self):
+        return len(self._y)
+
+    def __getitem__(self, index):
+        if type(index) == slice:
+            start, stop, step = index.indices(len(self._y))
+            return RegularData(self._x0, self._dx, self._y[index],
+                                self._first + start * self._stride, self._stride * step)
+        if index < 0:
+            index += len(self._y)
+        return self._get_x(index), float(self._y[index])
+
+    def __iter__(self):
+        for start in xrange(0, len(self._y), BLOCK_SIZE):
+            ys = self._y[start:start + BLOCK_SIZE].tolist()
+            for i, y in enumerate(ys):
+                yield self._get_x(start + i), y
+
+    def __repr__(self):
+        return "RegularData(%r, %r, %s)" % (self.get_start(), self.get_step(), _describe_column(self._y))
+
+    def _get_x(self, index):
+        return self._x0 + (self._first + index * self._stride) * self._dx
+
+    def _get_position(self, x):
+        #the (fractional) index of x
+        return ((x - self._x0) / self._dx - self._first) / self._stride
+
+    def get_columns(self):
+        """
+        Returns the x and y columns. The x column is created by this
+        method.
+
+        @return: pair of columns.
+        """
+        n = len(self._y)
+        if numpy != None:
+            return (numpy.arange(n) * self._stride + self._first) * self._dx + self._x0, self._y
+        return array.array("d", [self._get_x(i) for i in xrange(n)]), self._y
+
+    def get_start(self):
+        """
+        Returns the x value of the first point.
+
+        @return: float.
+        """
+        return self._get_x(0)
+
+    def get_step(self):
+        """
+        Returns the distance between the x values of two points.
+
+        @return: float.
+        """
+        return self._dx * self._stride
+
+    def _bisect(self, value):
+        n = len(self._y)
+        i = min(max(int(math.ceil(self._get_position(value))), 0), n)
+        #correct rounding errors of the division
+        while i > 0 and self._get_x(i - 1) >= value:
+            i -= 1
+        while i < n and self._get_x(i) < value:
+            i += 1
+        return i
+
+    def get_window(self, xmin, xmax):
+        start = self._bisect(xmin)
+        end = self._bisect(xmax)
+        while end < len(self._y) and self._get_x(end) <= xmax:
+            end += 1
+        return self[start:end]
+
+    def get_x_range(self):
+        if len(self._y) == 0:
+            return None
+        return self._get_x(0), self._get_x(len(self._y) - 1)
+
+    def get_index(self, x):
+        n = len(self._y)
+        if n == 0:
+            return None
+        return min(max(int(round(self._get_position(x))), 0), n - 1)
+
+def pack_columns(values):
+    """
+    Converts columns to strings with the raw (native byte order)
+    float64 values, so they can be sent to another process without
+    pickling every single value. See unpack_columns.
+    
+    @return: list of strings.
+    """
+    if numpy != None:
+        return [numpy.asarray(column, numpy.float64).tostring() for column in values]
+    return [array.array("d", column).tostring() for column in values]
+    
+def unpack_columns(packed):
+    """
+    Converts the strings returned by pack_columns back to columns.
+    
+    @return: list of numpy arrays (if numpy is installed) or
+    array.arrays.
+    """
+    values = []
+    for data in packed:
+        if numpy != None:
+            column = numpy.fromstring(data, numpy.float64)
+        else:
+            column = array.array("d")
+            column.fromstring(data)
+        values.append(column)
+    return values
+    
+def read_columns_job(job):
+    """
+    Reads the columns of a single data file in a worker process. job is
+    a tuple (filename, columns, cache_dir), see read_many_columns.
+    Errors are not raised but returned.
+    
+    @return: a (packed, error) tuple. packed are the columns converted
+    by pack_columns, or None if they were stored in cache_dir or if
+    there was an error. error is None or a string with the traceback.
+    """
+    filename, columns, cache_dir = job
+    try:
+        values = read_columns(filename, columns, cache_dir=cache_dir)
+        if cache_dir != None and len(values[0]) > 0:
+            #the parent maps the columns from the cache
+            return None, None
+        return pack_columns(values), None
+    except Exception:
+        return None, traceback.format_exc()
+        
+def read_many_columns(filenames, columns, processes=None, cache_dir=None):
+    """
+    Reads the same columns of many data files. The files are parsed
+    in a multiprocessing pool with processes workers (default: number
+    of cpus). If processes is 1 or a pool cannot be started, the files
+    are read one after another in this process.
+    
+    If cache_dir is given, the workers store the parsed columns in
+    the cache and this process memory-maps them from there, so the
+    data is not sent between the processes at all.
+    
+    @type filenames: list of strings
+    @param filenames: paths to the data files
+    @type columns: list of ints
+    @param columns: the indices of the columns to read
+    @type processes: int
+    @param processes: number of worker processes
+    @type cache_dir: string
+    @param cache_dir: optional directory to cache the parsed columns in
+    
+    @return: a list of (values, error) tuples in the order of
+    filenames. values is a list of columns (see read_columns) or None,
+    error is None or a string with the traceback.
+    """
+    jobs = [(filename, list(columns), cache_dir) for filename in filenames]
+    pool = workers.create_pool(processes, len(jobs))
+    if pool == None:
+        #no need to pack the columns in this process
+        return [_read_columns_result(*job) for job in jobs]
+    try:
+        results = pool.map(read_columns_job, jobs)
+    finally:
+        workers.close_pool(pool)
+    values = []
+    for (packed, error), job in zip(results, jobs):
+        if error != None:
+            values.append((None, error))
+        elif packed == None:
+            values.append(_read_columns_result(*job))
+        else:
+            values.append((unpack_columns(packed), None))
+    return values
+    
+def _read_columns_result(filename, columns, cache_dir):
+    try:
+        return read_columns(filename, columns, cache_dir=cache_dir), None
+    except Exception:
+        return None, traceback.format_exc()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+#
+#       export_cache.py
+#
+#       Copyright 2009 Sven Festersen <sven@sven-festersen.de>
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+"""
+This module contains caches for exported charts.
+
+An ExportCache stores the output of chart exports, keyed by the
+fingerprint of the chart (see Chart.get_fingerprint), the size, the
+format and the export options. If a chart has an export cache (see
+Chart.set_export_cache), exporting an unchanged chart again does not
+render it but returns the cached data.
+
+Example:
+
+cache = ExportCache(64, "/tmp/chart-cache")
+chart.set_export_cache(cache)
+chart.export_png("chart.png", (800, 600)) #rendered
+chart.export_png("chart.png", (800, 600)) #from the cache
+
+The cache directory holds at most max_files exports. If there are
+more, the files that were least recently used (by modification time,
+which is updated when a file is read) are removed.
+
+Author: Sven Festersen (sven@sven-festersen.de)
+"""
+__docformat__ = "epytext"
+import hashlib
+import os
+import re
+import threading
+
+from pygtk_chart import workers
+
+#the names of the files of an ExportCache (see ExportCache.get_key)
+KEY_PATTERN = re.compile(r"^[0-9a-f]{40}\.[a-z]+$")
+
+
+class LRUCache:
+    """
+    A size limited in-memory cache. If the cache is full, the least
+    recently used entry is removed.
+    """
+
+    def __init__(self, max_entries=256):
+        self._max_entries = max_entries
+        self._entries = {}
+        self._order = []
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached data for key or None.
+        """
+        self._lock.acquire()
+        try:
+            data = self._entries.get(key, None)
+            if data != None and self._order[-1] != key:
+                self._order.remove(key)
+                self._order.append(key)
+            return data
+        finally:
+            self._lock.release()
+
+    def set(self, key, data):
+        """
+        Stores data in the cache.
+        """
+        self._lock.acquire()
+        try:
+            if key in self._entries:
+                self._order.remove(key)
+            self._entries[key] = data
+            self._order.append(key)
+            while len(self._order) > self._max_entries:
+                del self._entries[self._order.pop(0)]
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._entries = {}
+            self._order = []
+        finally:
+            self._lock.release()
+
+
+class ExportCache(LRUCache):
+    """
+    A cache for exported charts. The data is kept in memory (at most
+    max_entries exports) and, if directory is not None, stored as
+    files in that directory (at most max_files exports), so it
+    survives the process.
+    """
+
+    def __init__(self, max_entries=64, directory=None, max_files=1024):
+        LRUCache.__init__(self, max_entries)
+        self._directory = directory
+        self._max_files = max_files
+        if directory != None and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def get_key(self, chart, format, size, options):
+        """
+        Returns the cache key for an export of chart.
+
+        @type chart: chart.Chart
+        @param chart: the exported chart
+        @type format: string
+        @param format: one of chart.EXPORT_FORMATS
+        @type size: pair of ints
+        @param size: the size of the export
+        @type options: dict
+        @param options: other options that change the output
+
+        @return: string.
+        """
+        hasher = hashlib.sha1(chart.get_fingerprint())
+        hasher.update(repr((format, tuple(size), sorted(options.items()))))
+        return "%s.%s" % (hasher.hexdigest(), format)
+
+    def get(self, key):
+        data = LRUCache.get(self, key)
+        if data == None and self._directory != None:
+            path = os.path.join(self._directory, key)
+            try:
+                f = open(path, "rb")
+                try:
+                    data = f.read()
+                finally:
+                    f.close()
+            except IOError:
+                return None
+            try:
+                #mark the file as recently used (see prune)
+                os.utime(path, None)
+            except OSError:
+                #removed by another process
+                pass
+            LRUCache.set(self, key, data)
+        return data
+
+    def set(self, key, data):
+        LRUCache.set(self, key, data)
+        if self._directory != None:
+            workers.write_atomically(self._directory, key, lambda f: f.write(data))
+            self.prune()
+
+    def prune(self, max_files=None):
+        """
+        Removes the least recently used files from the cache directory
+        until at most max_files (default: the max_files of the cache)
+        are left. This is done automatically when an export is stored.
+
+        @type max_files: int
+        @param max_files: the number of files to keep
+        """
+        if self._directory == None:
+            return
+        if max_files == None:
+            max_files = self._max_files
+        files = []
+        for name in os.listdir(self._directory):
+            if not KEY_PATTERN.match(name):
+                continue
+            path = os.path.join(self._directory, name)
+            try:
+                files.append((os.path.getmtime(path), path))
+            except OSError:
+                #removed by another process
+                pass
+        if len(files) <= max_files:
+            return
+        files.sort()
+        for mtime, path in files[:len(files) - max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """
+        Removes all entries from the cache, including their files in
+        the cache directory. Other files in the directory are kept.
+        """
+        LRUCache.clear(self)
+        if self._directory != None:
+            for name in os.listdir(self._directory):
+                if KEY_PATTERN.match(name):
+                    os.remove(os.path.join(self._directory, name))
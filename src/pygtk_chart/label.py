@@ -28,6 +28,7 @@ import gobject
 import gtk
 import math
 import pango
+import pangocairo
 import pygtk
 
 from pygtk_chart import basics
@@ -65,6 +66,20 @@ DRAWING_INITIALIZED = False
 REGISTERED_LABELS = []
 
 
+def create_pango_context():
+    """
+    Create a pango context for the labels that uses the default font
+    of gtk widgets. No widget is needed, so labels can be drawn
+    without a display.
+    
+    @return: pango.Context.
+    """
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)
+    context = pangocairo.CairoContext(cairo.Context(surface))
+    pango_context = context.create_pango_layout().get_context()
+    pango_context.set_font_description(basics.get_font_description())
+    return pango_context
+
 def begin_drawing():
     global DRAWING_INITIALIZED
     DRAWING_INITIALIZED = True
@@ -85,6 +100,20 @@ def get_registered_labels():
     return []
 
 
+class LabelArea:
+    """
+    The area a label was drawn to. Cached layers keep the areas of
+    their labels and register them again (see register_label) when
+    they are painted, so labels on other layers still avoid them.
+    """
+    
+    def __init__(self, allocation):
+        self._allocation = allocation
+        
+    def get_allocation(self):
+        return self._allocation
+
+
 class Label(ChartObject):
     """
     This class is used for drawing all the text on the chart widgets.
@@ -255,8 +284,7 @@ class Label(ChartObject):
         angle = 2 * math.pi * self._rotation / 360.0
         
         if self._context == None:
-            label = gtk.Label()
-            self._context = label.create_pango_context()          
+            self._context = create_pango_context()
         pango_context = self._context
         
         attrs = pango.AttrList()
@@ -337,8 +365,7 @@ class Label(ChartObject):
         angle = 2 * math.pi * self._rotation / 360.0
         
         if self._context == None:
-            label = gtk.Label()
-            self._context = label.create_pango_context()          
+            self._context = create_pango_context()
         pango_context = self._context
         
         attrs = pango.AttrList()
@@ -28,13 +28,23 @@ import gobject
 import cairo
 import gtk
 import math
+import operator
 import os
+import pickle
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 import pygtk_chart
 from pygtk_chart.basics import *
-from pygtk_chart.chart_object import ChartObject
+from pygtk_chart.chart_object import ChartObject, fingerprint_function
 from pygtk_chart import chart
+from pygtk_chart import data_file
+from pygtk_chart.export_cache import LRUCache
 from pygtk_chart import label
+from pygtk_chart import workers
 from pygtk_chart import COLORS, COLOR_AUTO
 
 RANGE_AUTO = 0
@@ -52,6 +62,9 @@ POSITION_TOP_RIGHT = 8
 POSITION_BOTTOM_RIGHT = 9
 POSITION_BOTTOM_LEFT = 10
 POSITION_TOP_LEFT = 11
+#limits for optimize_sampling
+MAX_SAMPLING_ROUNDS = 64
+MAX_SAMPLING_POINTS = 100000
 
         
 def draw_point(context, x, y, radius, style):
@@ -133,6 +146,55 @@ def draw_errors(context, rect, range_calc, x, y, errors, draw_x, draw_y, xaxis,
             context.rel_line_to(2 * size, 0)
             context.stroke()
     
+def simplify_polyline(points, tolerance):
+    """
+    Simplifies a polyline so that it does not move by more than
+    tolerance. Points that are very close to their predecessor are
+    dropped first, the remaining line is simplified with the
+    Douglas-Peucker algorithm (each step with half the tolerance).
+    
+    @type points: list of (x, y) tuples
+    @param points: the polyline in device coordinates
+    @type tolerance: float
+    @param tolerance: the tolerance in device units
+    
+    @return: list of (x, y) tuples.
+    """
+    if tolerance <= 0 or len(points) < 3:
+        return points
+    t2 = (tolerance / 2.0) ** 2
+    px, py = points[0]
+    reduced = [points[0]]
+    for (x, y) in points:
+        if (x - px) ** 2 + (y - py) ** 2 > t2:
+            reduced.append((x, y))
+            px, py = x, y
+    if reduced[-1] != points[-1]:
+        reduced.append(points[-1])
+        
+    keep = [False] * len(reduced)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(reduced) - 1)]
+    while stack:
+        first, last = stack.pop()
+        x0, y0 = reduced[first]
+        dx, dy = reduced[last][0] - x0, reduced[last][1] - y0
+        length2 = float(dx * dx + dy * dy)
+        max_dist, index = t2, None
+        for i in xrange(first + 1, last):
+            x, y = reduced[i]
+            t = 0
+            if length2 > 0:
+                t = min(1, max(0, ((x - x0) * dx + (y - y0) * dy) / length2))
+            dist = (x - x0 - t * dx) ** 2 + (y - y0 - t * dy) ** 2
+            if dist > max_dist:
+                max_dist, index = dist, i
+        if index != None:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for (point, k) in zip(reduced, keep) if k]
+    
 def separate_data_and_errors(old_data):
     data = []
     errors = {}
@@ -143,64 +205,196 @@ def separate_data_and_errors(old_data):
             data.append((d[0], d[1]))
             errors[(d[0], d[1])] = (d[2], d[3])
     return data, errors
+    
+def sort_points(points):
+    """
+    Sorts a list of points by x in place. Points with the same x
+    value keep their order. Nothing is done if the points are already
+    sorted.
+    
+    @type points: list of (x, y) pairs
+    @param points: the points to sort
+    """
+    for i in range(1, len(points)):
+        if points[i][0] < points[i - 1][0]:
+            points.sort(key=operator.itemgetter(0))
+            return
+            
+def bisect_points(points, x, right=False):
+    """
+    Returns the index at which a point with x value x has to be
+    inserted into points (a list sorted by x) to keep it sorted. If
+    right is True, the index is after all points with that x value,
+    otherwise before them.
+    
+    @return: int.
+    """
+    low, high = 0, len(points)
+    while low < high:
+        middle = (low + high) / 2
+        if points[middle][0] < x or (right and points[middle][0] == x):
+            low = middle + 1
+        else:
+            high = middle
+    return low
+    
+def merge_points(data, points):
+    """
+    Merges points into data in place. Both lists have to be sorted by
+    x, the result is sorted by x as well (points with the same x value
+    are added after the existing points). If the points come after
+    the existing data, they are just appended; otherwise only the
+    part of data after the first new point is merged, so adding a few
+    late points near the end of a long list is cheap.
+    
+    @type data: list of (x, y) pairs
+    @param data: the sorted list to merge into
+    @type points: list of (x, y) pairs
+    @param points: the sorted points to add
+    """
+    if not points:
+        return
+    if not data or points[0][0] >= data[-1][0]:
+        data.extend(points)
+        return
+    start = bisect_points(data, points[0][0], True)
+    tail = data[start:]
+    merged = []
+    i, j = 0, 0
+    while i < len(tail) and j < len(points):
+        if points[j][0] < tail[i][0]:
+            merged.append(points[j])
+            j += 1
+        else:
+            merged.append(tail[i])
+            i += 1
+    merged.extend(tail[i:])
+    merged.extend(points[j:])
+    data[start:] = merged
 
 
 class RangeCalculator:
     """
     This helper class calculates ranges. It is used by the LineChart
     widget internally, there is no need to create an instance yourself.
+    
+    The data ranges of added graphs are only calculated when they are
+    needed, i.e. when the visible range is RANGE_AUTO. Graphs that
+    draw from memory-mapped columns (see graph_new_from_binary) then
+    do not have to read all their values if the range is fixed.
     """
     def __init__(self):
         self._data_xrange = None
         self._data_yrange = None
+        self._unmerged_xranges = []
+        self._unmerged_yranges = []
         self._xrange = RANGE_AUTO
         self._yrange = RANGE_AUTO
         self._cached_xtics = []
         self._cached_ytics = []
+        self._frozen = 0
+        self._pending_graphs = []
+        self._revision = 0
+        self._snap_width = None
+        
+    def get_revision(self):
+        """
+        Returns the revision of the RangeCalculator. It is increased
+        every time the data ranges or the visible ranges are changed.
+        
+        @return: int.
+        """
+        return self._revision
 
-    def add_graph(self, graph):
-        if self._data_xrange == None:
-            self._data_yrange = graph.get_y_range()
-            self._data_xrange = graph.get_x_range()
-        else:
-            yrange = graph.get_y_range()
-            xrange = graph.get_x_range()
+    def freeze(self):
+        """
+        Defer range calculations of added graphs until thaw() is called.
+        """
+        self._frozen += 1
 
-            if xrange and yrange:
-                xmin = min(xrange[0], self._data_xrange[0])
-                xmax = max(xrange[1], self._data_xrange[1])
-                ymin = min(yrange[0], self._data_yrange[0])
-                ymax = max(yrange[1], self._data_yrange[1])
+    def thaw(self):
+        """
+        Calculate the ranges of the graphs that were added while the
+        RangeCalculator was frozen. Every graph is only processed once.
+        """
+        self._frozen -= 1
+        if self._frozen > 0: return
+        graphs = self._pending_graphs
+        self._pending_graphs = []
+        for graph in graphs:
+            self.add_graph(graph)
 
-                self._data_xrange = (xmin, xmax)
-                self._data_yrange = (ymin, ymax)
+    def add_graph(self, graph):
+        if self._frozen > 0:
+            if graph not in self._pending_graphs:
+                self._pending_graphs.append(graph)
+            return
+        self._revision += 1
+        for graphs in (self._unmerged_xranges, self._unmerged_yranges):
+            if graph not in graphs:
+                graphs.append(graph)
+                
+    def _get_data_xrange(self):
+        if self._unmerged_xranges:
+            ranges = [graph.get_x_range() for graph in self._unmerged_xranges]
+            self._data_xrange = merge_ranges(self._data_xrange, ranges)
+            self._unmerged_xranges = []
+        return self._data_xrange
+        
+    def _get_data_yrange(self):
+        if self._unmerged_yranges:
+            ranges = [graph.get_y_range() for graph in self._unmerged_yranges]
+            self._data_yrange = merge_ranges(self._data_yrange, ranges)
+            self._unmerged_yranges = []
+        return self._data_yrange
 
     def get_ranges(self, xaxis, yaxis):
         xrange = self._xrange
         if xrange == RANGE_AUTO:
-            xrange = self._data_xrange
+            xrange = self._get_data_xrange()
             if xrange[0] == xrange[1]:
                 xrange = (xrange[0], xrange[0] + 0.1)
 
         yrange = self._yrange
         if yrange == RANGE_AUTO:
-            yrange = self._data_yrange
+            yrange = self._get_data_yrange()
             if yrange[0] == yrange[1]:
                 yrange = (yrange[0], yrange[0] + 0.1)
                 
                 
         if xaxis.get_logarithmic():
             xrange = math.log10(xrange[0]), math.log10(xrange[1])
+        elif self._snap_width != None:
+            #move the range to the closest multiple of the size of a px
+            span = xrange[1] - xrange[0]
+            px = span / self._snap_width
+            xmin = round(xrange[0] / px) * px
+            xrange = (xmin, xmin + span)
         if yaxis.get_logarithmic():
             yrange = math.log10(yrange[0]), math.log10(yrange[1])
 
         return (xrange, yrange)
+        
+    def set_snap_width(self, width):
+        """
+        If width is not None, get_ranges moves the visible xrange by
+        less than half a px (of a graph area that is width px wide),
+        so that its start is a multiple of the size of a px. Ranges
+        that slide by fractions of a px then differ by whole px.
+        LineChart uses this while it draws a strip chart.
+        
+        @type width: float
+        @param width: The width of the graph area in px or None.
+        """
+        self._snap_width = width
 
     def set_xrange(self, xrange):
         self._xrange = xrange
+        self._revision += 1
 
     def set_yrange(self, yrange):
         self._yrange = yrange
+        self._revision += 1
 
     def get_absolute_zero(self, rect, xaxis, yaxis):
         xrange, yrange = self.get_ranges(xaxis, yaxis)
@@ -330,6 +524,10 @@ class LineChart(chart.Chart):
         self.legend = Legend()
         
         self._highlighted_points = []
+        self._layer_geometry = None
+        self._strip_chart = False
+        self._graph_layer_states = {}
+        self._appended_graphs = []
 
         self.xaxis.connect("appearance_changed", self._cb_appearance_changed)
         self.yaxis.connect("appearance_changed", self._cb_appearance_changed)
@@ -340,16 +538,85 @@ class LineChart(chart.Chart):
         for name, graph in self.graphs.iteritems():
             yield graph
             
+    def freeze_update(self):
+        """
+        Defer the handling of appearance changes, range calculations
+        and redraws until thaw_update() is called. See
+        chart.Chart.freeze_update for details.
+        """
+        chart.Chart.freeze_update(self)
+        self._range_calc.freeze()
+        
+    def thaw_update(self):
+        """
+        Recalculate the ranges and apply the updates that were deferred
+        since the matching call to freeze_update().
+        """
+        self._range_calc.thaw()
+        chart.Chart.thaw_update(self)
+            
     def _cb_button_pressed(self, widget, event):
         points = chart.get_sensitive_areas(event.x, event.y)
         for x, y, graph in points:
             self.emit("datapoint-clicked", graph, (x, y))
     
     def _cb_motion_notify(self, widget, event):
-        self._highlighted_points = chart.get_sensitive_areas(event.x, event.y)
+        points = chart.get_sensitive_areas(event.x, event.y)
+        changed = points != self._highlighted_points
+        layers = ["graph:%s" % graph.get_name() for x, y, graph in self._highlighted_points + points]
+        self._highlighted_points = points
         for x, y, graph in self._highlighted_points:
             self.emit("datapoint-hovered", graph, (x, y))
-        self.queue_draw()
+        if changed:
+            self._invalidate_layers(layers)
+            
+    def _do_appearance_changed(self, object):
+        """
+        Handle the appearance change of an object. Only the layer of
+        that object is rendered again, a graph also invalidates the
+        legend and the graphs that are filled to it.
+        """
+        if object == self.background:
+            layers = ["background"]
+        elif object == self.title:
+            layers = ["title"]
+        elif object == self.grid:
+            layers = ["grid"]
+        elif object in (self.xaxis, self.yaxis):
+            layers = ["axes"]
+        elif object == self.legend:
+            layers = ["legend"]
+        else:
+            layers = ["legend"]
+            for name, graph in self.graphs.iteritems():
+                if graph == object and self._is_data_appended(name, graph):
+                    #the new points are drawn on the cached layer
+                    if name not in self._appended_graphs:
+                        self._appended_graphs.append(name)
+                elif graph == object or graph.get_fill_to() == object:
+                    layers.append("graph:%s" % name)
+        self._invalidate_layers(layers)
+        
+    def _is_data_appended(self, name, graph):
+        """
+        Returns True if the only change of graph since its layer was
+        rendered is data that was added after its last point. The
+        layer of a strip chart can then be updated by drawing the
+        new points (see _scroll_graph_layers).
+        """
+        state = self._graph_layer_states.get(name, None)
+        if not self._strip_chart or state == None or "graph:%s" % name not in self._layers:
+            return False
+        if self.xaxis.get_logarithmic() or not graph.can_draw_scrolled():
+            return False
+        style_revision, data_revision, last_x, count = state
+        data = graph.get_data()
+        if graph.get_style_revision() != style_revision or graph.get_data_revision() == data_revision:
+            return False
+        if isinstance(data, data_file.ColumnData):
+            return False
+        #no points were added before the last rendered point
+        return bisect_points(data, last_x, True) == count
 
     def _do_draw_graphs(self, context, rect):
         """
@@ -360,9 +627,46 @@ class LineChart(chart.Chart):
         @type rect: gtk.gdk.Rectangle
         @param rect: A rectangle representing the charts area.
         """
+        if self._raster_dpi != None:
+            self._do_draw_graphs_rasterized(context, rect)
+            return
         for (name, graph) in self.graphs.iteritems():
-            graph.draw(context, rect, self.xaxis, self.yaxis, self._highlighted_points)
-        self._highlighted_points = []
+            graph.draw(context, rect, self.xaxis, self.yaxis, self._highlighted_points, tolerance=self._path_tolerance)
+            
+    def _do_draw_graphs_rasterized(self, context, rect):
+        """
+        Draw the data of all graphs (lines, points, errorbars and
+        fillings) to an image with the resolution self._raster_dpi and
+        paint it on context. The titles and value labels of the graphs
+        are drawn on context, so they stay vector graphics.
+
+        @type context: cairo.Context
+        @param context: The context to draw on.
+        @type rect: gtk.gdk.Rectangle
+        @param rect: A rectangle representing the charts area.
+        """
+        scale = self._raster_dpi / 72.0
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32,
+                                        int(math.ceil(rect.width * scale)),
+                                        int(math.ceil(rect.height * scale)))
+        raster_context = chart.create_context(surface)
+        raster_context.scale(scale, scale)
+        raster_context.translate(-rect.x, -rect.y)
+        raster_context.set_line_width(context.get_line_width())
+        last_points = {}
+        for (name, graph) in self.graphs.iteritems():
+            last_points[name] = graph.draw(raster_context, rect, self.xaxis, self.yaxis, self._highlighted_points, part="data")
+        del raster_context
+        
+        context.save()
+        context.translate(rect.x, rect.y)
+        context.scale(1 / scale, 1 / scale)
+        context.set_source_surface(surface, 0, 0)
+        context.paint()
+        context.restore()
+        
+        for (name, graph) in self.graphs.iteritems():
+            graph.draw(context, rect, self.xaxis, self.yaxis, self._highlighted_points, part="labels", last_point=last_points[name])
 
     def _do_draw_axes(self, context, rect):
         """
@@ -387,11 +691,11 @@ class LineChart(chart.Chart):
         """
         label.begin_drawing()
         chart.init_sensitive_areas()
-        rect = self.get_allocation()
+        rect = self._get_render_rect()
         self._range_calc.prepare_tics(rect, self.xaxis, self.yaxis)
         #initial context settings: line width & font
         context.set_line_width(1)
-        font = gtk.Label().style.font_desc.get_family()
+        font = get_font_description().get_family()
         context.select_font_face(font,cairo.FONT_SLANT_NORMAL, \
                                     cairo.FONT_WEIGHT_NORMAL)
 
@@ -409,6 +713,186 @@ class LineChart(chart.Chart):
         label.finish_drawing()
         
         self.legend.draw(context, rect, self.graphs)
+        
+    def _draw_cache(self, context):
+        """
+        Render the chart to the offscreen cache surface. Background,
+        title, grid, axes, every graph and the legend are cached on
+        layers of their own, only invalid layers are rendered again.
+        If the size of the chart or the visible ranges changed, all
+        layers that depend on them are invalidated.
+
+        @type context: cairo.Context
+        @param context: A context on the cache surface.
+        """
+        rect = self.get_allocation()
+        if self._strip_chart:
+            #the layers can be shifted by whole px only
+            self._range_calc.set_snap_width(rect.width * (1 - 2 * GRAPH_PADDING))
+        try:
+            self._draw_layers(context, rect)
+        finally:
+            self._range_calc.set_snap_width(None)
+            
+    def _draw_layers(self, context, rect):
+        """
+        Render the layers of the chart, see _draw_cache.
+        
+        @type context: cairo.Context
+        @param context: A context on the cache surface.
+        @type rect: gtk.gdk.Rectangle
+        @param rect: A rectangle representing the charts area.
+        """
+        label.begin_drawing()
+        chart.init_sensitive_areas()
+        self._range_calc.prepare_tics(rect, self.xaxis, self.yaxis)
+        
+        data_available = False
+        for (name, graph) in self.graphs.iteritems():
+            if graph.has_something_to_draw():
+                data_available = True
+                break
+        
+        geometry = (rect.width, rect.height, data_available,
+                    self._range_calc.get_ranges(self.xaxis, self.yaxis))
+        appended = self._appended_graphs
+        self._appended_graphs = []
+        if self._layer_geometry == None or self._layer_geometry[:2] != geometry[:2]:
+            self._layers = {}
+        elif self._layer_geometry != geometry:
+            dx = self._get_strip_shift(rect, self._layer_geometry, geometry)
+            for name in self._layers.keys():
+                if name in ["background", "title", "legend"]:
+                    continue
+                if dx != None and name.startswith("graph:"):
+                    continue
+                del self._layers[name]
+            if dx != None:
+                self._scroll_graph_layers(rect, dx, appended)
+        elif appended:
+            self._scroll_graph_layers(rect, 0, appended)
+        self._layer_geometry = geometry
+        
+        self._draw_layer(context, rect, "background", self.background.draw, rect)
+        self._draw_layer(context, rect, "title", self.title.draw, rect)
+        if self.graphs and data_available:
+            self._draw_layer(context, rect, "grid", self.grid.draw, rect, self.xaxis, self.yaxis)
+            self._draw_layer(context, rect, "axes", self._do_draw_axes, rect)
+            for (name, graph) in self.graphs.iteritems():
+                self._draw_layer(context, rect, "graph:%s" % name, graph.draw, rect, self.xaxis, self.yaxis, self._highlighted_points)
+        label.finish_drawing()
+        
+        self._draw_layer(context, rect, "legend", self.legend.draw, rect, self.graphs)
+        
+        #remember what the graph layers show (see _is_data_appended)
+        self._graph_layer_states = {}
+        for (name, graph) in self.graphs.iteritems():
+            data = graph.get_data()
+            if "graph:%s" % name in self._layers and len(data) > 0:
+                self._graph_layer_states[name] = (graph.get_style_revision(),
+                                                    graph.get_data_revision(),
+                                                    data[-1][0], len(data))
+
+    def _get_strip_shift(self, rect, old_geometry, geometry):
+        """
+        Returns the number of px the graphs have to be shifted left by
+        if the chart is in strip chart mode and the xrange slid to
+        larger x values, None otherwise. The xrange of a strip chart is
+        snapped to whole px while it is drawn (see
+        RangeCalculator.set_snap_width), so it always slides by a whole
+        number of px.
+        """
+        if not self._strip_chart or self.xaxis.get_logarithmic():
+            return None
+        if old_geometry[:3] != geometry[:3] or old_geometry[3][1] != geometry[3][1]:
+            return None
+        (old_xmin, old_xmax), (xmin, xmax) = old_geometry[3][0], geometry[3][0]
+        span = old_xmax - old_xmin
+        if abs((xmax - xmin) - span) > 1e-9 * span:
+            return None
+        width = rect.width * (1 - 2 * GRAPH_PADDING)
+        dx = (xmin - old_xmin) * width / span
+        if dx <= 0 or dx >= width or abs(dx - round(dx)) > 0.01:
+            return None
+        return int(round(dx))
+        
+    def _scroll_graph_layers(self, rect, dx, appended):
+        """
+        Shift the cached graph layers left by dx px and draw only the
+        columns that changed (see Graph.draw_scrolled). Layers of graphs
+        that cannot be scrolled are invalidated. For the graphs in
+        appended (names of graphs that data was appended to, see
+        _is_data_appended) the columns from their last rendered point
+        on are drawn as well. If dx is 0, only those graphs are
+        updated.
+        """
+        for name, graph in self.graphs.iteritems():
+            layer = "graph:%s" % name
+            if layer not in self._layers:
+                continue
+            redraw_from = None
+            if name in appended:
+                redraw_from = self._graph_layer_states[name][2]
+            elif dx == 0:
+                continue
+            if not graph.can_draw_scrolled():
+                del self._layers[layer]
+                continue
+            surface, areas, label_areas = self._layers[layer]
+            #the only label on a scrollable graph layer is the title;
+            #its position is taken from the layer because rendering the
+            #chart with another size (see Chart.render) moves the label
+            title_x = None
+            for area in label_areas:
+                x = area.get_allocation().x
+                if title_x == None or x < title_x:
+                    title_x = x
+            new_surface = surface.create_similar(cairo.CONTENT_COLOR_ALPHA, rect.width, rect.height)
+            context = chart.create_context(new_surface)
+            context.set_source_surface(surface, -dx, 0)
+            context.paint()
+            context.set_line_width(1)
+            
+            chart.init_sensitive_areas()
+            first_label = len(label.get_registered_labels())
+            bands = graph.draw_scrolled(context, rect, self.xaxis, self.yaxis, self._highlighted_points, dx, redraw_from, title_x)
+            new_areas = chart.get_all_sensitive_areas()
+            #the labels are registered again when the layer is painted
+            registered = label.get_registered_labels()
+            new_label_areas = [label.LabelArea(l.get_allocation()) for l in registered[first_label:]]
+            del registered[first_label:]
+            redrawn = [data for (type, coords, data) in new_areas]
+            for (type, coords, data) in areas:
+                ax = coords[0] - dx
+                in_band = False
+                for (x0, x1) in bands:
+                    if x0 <= ax <= x1:
+                        in_band = True
+                if not in_band and data not in redrawn:
+                    new_areas.append((type, (ax,) + coords[1:], data))
+            self._layers[layer] = (new_surface, new_areas, new_label_areas)
+        chart.init_sensitive_areas()
+        
+    def set_strip_chart(self, strip):
+        """
+        Set whether the chart is used as a strip chart. If the visible
+        xrange of a strip chart slides to larger x values (set_xrange
+        with a constant width), the cached graphs are shifted and only
+        the columns that changed are drawn again. Axes and grid are
+        redrawn separately. To shift by whole px, the xrange is drawn
+        moved by less than half a px to a multiple of the size of a px.
+        
+        @type strip: boolean.
+        """
+        self._strip_chart = strip
+        
+    def get_strip_chart(self):
+        """
+        Returns True if the chart is used as a strip chart.
+        
+        @return: boolean.
+        """
+        return self._strip_chart
 
     def add_graph(self, graph):
         """
@@ -424,6 +908,7 @@ class LineChart(chart.Chart):
         self._range_calc.add_graph(graph)
 
         graph.connect("appearance-changed", self._cb_appearance_changed)
+        self.queue_draw()
 
     def remove_graph(self, name):
         """
@@ -445,7 +930,7 @@ class LineChart(chart.Chart):
         @param xrange: The new xrange.
         """
         self._range_calc.set_xrange(xrange)
-        self.queue_draw()
+        self._invalidate_layers([])
         
     def get_xrange(self):
         return self._range_calc.get_ranges(self.xaxis, self.yaxis)[0]
@@ -460,10 +945,14 @@ class LineChart(chart.Chart):
         @param yrange: The new yrange.
         """
         self._range_calc.set_yrange(yrange)
-        self.queue_draw()
+        self._invalidate_layers([])
         
     def get_yrange(self):
         return self._range_calc.get_ranges(self.xaxis, self.yaxis)[1]
+        
+    def _get_fingerprint_state(self):
+        #the ranges and highlighted points are not stored in properties
+        return self._range_calc.get_ranges(self.xaxis, self.yaxis), self._highlighted_points
 
 
 class Axis(ChartObject):
@@ -1182,7 +1671,8 @@ class Graph(ChartObject):
         error data for a datapoint, the tuple for that point has to be
         (x, y, xerror, yerror). If you want only one error, set the
         other to zero. You can mix datapoints with and without error
-        data in data.
+        data in data. The points are kept sorted by x, they do not
+        have to be sorted in data.
 
         @type name: string
         @param name: A unique name for the graph. This could be everything.
@@ -1192,12 +1682,18 @@ class Graph(ChartObject):
         @param title: The graphs title. This can be drawn on the chart.
         @type data: list (see above)
         @param data: This is the data you want to be visualized. For
-        detail see description above.
+        detail see description above. data can also be a
+        data_file.ColumnData or data_file.RegularData object.
         """
         ChartObject.__init__(self)
         self._name = name
         self._title = title
-        self._data, self._errors = separate_data_and_errors(data)
+        if isinstance(data, data_file.ColumnData):
+            self._set_data(data, {})
+        else:
+            self._set_data(*separate_data_and_errors(data))
+        self._data_revision = 0
+        self._style_revision = 0
         self._color = COLOR_AUTO
         self._type = GRAPH_BOTH
         self._point_size = 2
@@ -1289,19 +1785,52 @@ class Graph(ChartObject):
             self._draw_yerrors = value
         else:
             raise AttributeError, "Property %s does not exist." % property.name
+        self._style_revision += 1
 
+    def _set_data(self, data, errors):
+        """
+        Replaces the data of the graph. Lists of points are sorted by
+        x in place, ColumnData with unsorted x values is replaced by a
+        sorted copy (see data_file.ColumnData.get_sorted).
+        """
+        if isinstance(data, data_file.ColumnData):
+            data = data.get_sorted()
+        else:
+            sort_points(data)
+        self._data = data
+        self._errors = errors
+        self._yrange = None
+        
+    def _get_fingerprint_state(self):
+        return self._data, sorted(self._errors.items())
+        
     def has_something_to_draw(self):
-        return self._data != []
+        return len(self._data) > 0
+        
+    def _get_visible_data(self, xrange, xaxis):
+        """
+        Returns the data points that may be in xrange. The points are
+        sorted by x, so only the points in xrange are returned, found
+        by bisection.
+        For ColumnData only that part of the columns is accessed.
+        """
+        xmin, xmax = xrange
+        if xaxis.get_logarithmic():
+            xmin, xmax = 10 ** xmin, 10 ** xmax
+        if isinstance(self._data, data_file.ColumnData):
+            return self._data.get_window(xmin, xmax)
+        return self._data[bisect_points(self._data, xmin):bisect_points(self._data, xmax, True)]
         
-    def _do_draw_lines(self, context, rect, xrange, yrange, xaxis, yaxis):
+    def _do_draw_lines(self, context, rect, xrange, yrange, xaxis, yaxis, tolerance=0):
         context.set_source_rgb(*color_gdk_to_cairo(self._color))
         
         set_context_line_style(context, self._line_style)
         
         first_point = None
         last_point = None
+        points = []
         
-        for (x, y) in self._data:
+        for (x, y) in self._get_visible_data(xrange, xaxis):
             
             if xaxis.get_logarithmic():
                 x = math.log10(x)
@@ -1311,12 +1840,15 @@ class Graph(ChartObject):
             if is_in_range(x, xrange) and is_in_range(y, yrange):
                 (ax, ay) = self._range_calc.get_absolute_point(rect, x, y, xaxis, yaxis)
                 if first_point == None:
-                    context.move_to(ax, ay)
                     first_point = x, y
-                else:
-                    context.line_to(ax, ay)
+                points.append((ax, ay))
                 last_point = ax, ay
-                    
+                
+        points = simplify_polyline(points, tolerance)
+        if points:
+            context.move_to(*points[0])
+        for point in points[1:]:
+            context.line_to(*point)
         context.stroke()
         context.set_dash([])
         return first_point, last_point
@@ -1327,7 +1859,7 @@ class Graph(ChartObject):
         first_point = None
         last_point = None
         
-        for (x, y) in self._data:
+        for (x, y) in self._get_visible_data(xrange, xaxis):
             if xaxis.get_logarithmic():
                 x = math.log10(x)
             if yaxis.get_logarithmic():
@@ -1358,9 +1890,10 @@ class Graph(ChartObject):
         return first_point, last_point
         
     def _do_draw_values(self, context, rect, xrange, yrange, xaxis, yaxis):
+        data = self._get_visible_data(xrange, xaxis)
         anchors = {}
         first_point = True
-        for i, (x, y) in enumerate(self._data):
+        for i, (x, y) in enumerate(data):
             
             if xaxis.get_logarithmic():
                 x = math.log10(x)
@@ -1369,8 +1902,8 @@ class Graph(ChartObject):
             
             if is_in_range(x, xrange) and is_in_range(y, yrange):
                 next_point = None
-                if i + 1 < len(self._data) and (is_in_range(self._data[i + 1][0], xrange) and is_in_range(self._data[i + 1][1], yrange)):
-                    next_point = self._data[i + 1]
+                if i + 1 < len(data) and (is_in_range(data[i + 1][0], xrange) and is_in_range(data[i + 1][1], yrange)):
+                    next_point = data[i + 1]
                 if first_point:
                     if next_point != None:
                         if next_point[1] >= y:
@@ -1379,7 +1912,7 @@ class Graph(ChartObject):
                             anchors[(x, y)] = label.ANCHOR_BOTTOM_LEFT
                     first_point = False
                 else:
-                    previous_point = self._data[i - 1]
+                    previous_point = data[i - 1]
                     if next_point != None:
                         if previous_point[1] <= y <= next_point[1]:
                             anchors[(x, y)] = label.ANCHOR_BOTTOM_RIGHT
@@ -1395,7 +1928,7 @@ class Graph(ChartObject):
                         else:
                             anchors[(x, y)] = label.ANCHOR_BOTTOM_RIGHT
                             
-        for x, y in self._data:
+        for x, y in data:
             
             if xaxis.get_logarithmic():
                 x = math.log10(x)
@@ -1426,10 +1959,11 @@ class Graph(ChartObject):
             self._label.set_color(self._color)
             self._label.draw(context, rect)
             
-    def _do_draw_fill(self, context, rect, xrange, xaxis, yaxis):
+    def _do_draw_fill(self, context, rect, xrange, xaxis, yaxis, tolerance=0):
+        data_a = self._get_visible_data(xrange, xaxis)
         if type(self._fill_to) in (int, float):
             data = []
-            for i, (x, y) in enumerate(self._data):
+            for i, (x, y) in enumerate(data_a):
                 
                 if xaxis.get_logarithmic():
                     x = math.log10(x)
@@ -1441,7 +1975,7 @@ class Graph(ChartObject):
                 elif not is_in_range(x, xrange) and len(data) == 1:
                     data.append((prev, self._fill_to))
                     break
-                elif i == len(self._data) - 1:
+                elif i == len(data_a) - 1:
                     data.append((x, self._fill_to))
                 prev = x
             graph = Graph("none", "", data)
@@ -1458,11 +1992,9 @@ class Graph(ChartObject):
         c = color_gdk_to_cairo(c)
         context.set_source_rgba(c[0], c[1], c[2], self._fill_opacity)
         
-        data_a = self._data
         data_b = graph.get_data()
         
-        first = True
-        start_point = (0, 0)
+        points = []
         for x, y in data_a:
             
             if xaxis.get_logarithmic():
@@ -1471,13 +2003,14 @@ class Graph(ChartObject):
                 y = math.log10(y)
             
             if is_in_range(x, xrange):
-                xa, ya = self._range_calc.get_absolute_point(rect, x, y, xaxis, yaxis)
-                if first:
-                    context.move_to(xa, ya)
-                    start_point = xa, ya
-                    first = False
-                else:
-                    context.line_to(xa, ya)
+                points.append(self._range_calc.get_absolute_point(rect, x, y, xaxis, yaxis))
+        points = simplify_polyline(points, tolerance)
+        start_point = (0, 0)
+        if points:
+            start_point = points[0]
+            context.move_to(*start_point)
+        for point in points[1:]:
+            context.line_to(*point)
                 
         first = True
         for i in range(0, len(data_b)):
@@ -1489,7 +2022,7 @@ class Graph(ChartObject):
         context.line_to(*start_point)
         context.fill()
 
-    def _do_draw(self, context, rect, xaxis, yaxis, highlighted_points):
+    def _do_draw(self, context, rect, xaxis, yaxis, highlighted_points, xwindow=None, tolerance=0, part=None, last_point=None):
         """
         Draw the graph.
 
@@ -1497,23 +2030,156 @@ class Graph(ChartObject):
         @param context: The context to draw on.
         @type rect: gtk.gdk.Rectangle
         @param rect: A rectangle representing the charts area.
+        @type xwindow: pair of numbers
+        @param xwindow: If not None, only the points in this part of
+        the visible xrange are drawn.
+        @type tolerance: float
+        @param tolerance: Lines and fillings are simplified to this
+        tolerance in px (see simplify_polyline).
+        @type part: string
+        @param part: If 'data', only lines, points, errorbars and the
+        filling are drawn and the position of the last point is
+        returned. If 'labels', only the value labels and the title
+        are drawn, the title is placed at last_point. If None, the
+        whole graph is drawn.
         """
         (xrange, yrange) = self._range_calc.get_ranges(xaxis, yaxis)
-                
-        if self._type in [GRAPH_LINES, GRAPH_BOTH]:
-            first_point, last_point = self._do_draw_lines(context, rect, xrange, yrange, xaxis, yaxis)
+        show_title = self._show_title
+        if xwindow != None:
+            #the title belongs to the last visible point
+            show_title = show_title and xwindow[1] >= xrange[1]
+            xrange = intersect_ranges(xrange, xwindow)
             
-        if self._type in [GRAPH_POINTS, GRAPH_BOTH]:
-            first_point, last_point = self._do_draw_points(context, rect, xrange, yrange, xaxis, yaxis, highlighted_points)
+        if part != "labels":
+            first_point, last_point = None, None
+            
+            if self._type in [GRAPH_LINES, GRAPH_BOTH]:
+                first_point, last_point = self._do_draw_lines(context, rect, xrange, yrange, xaxis, yaxis, tolerance)
+                
+            if self._type in [GRAPH_POINTS, GRAPH_BOTH]:
+                first_point, last_point = self._do_draw_points(context, rect, xrange, yrange, xaxis, yaxis, highlighted_points)
 
-        if self._fill_to != None:
-            self._do_draw_fill(context, rect, xrange, xaxis, yaxis)
+            if self._fill_to != None:
+                self._do_draw_fill(context, rect, xrange, xaxis, yaxis, tolerance)
+                
+        if part == "data":
+            return last_point
         
         if self._show_value and self._type in [GRAPH_POINTS, GRAPH_BOTH]:
             self._do_draw_values(context, rect, xrange, yrange, xaxis, yaxis)
 
-        if self._show_title:
+        if show_title:
             self._do_draw_title(context, rect, last_point, xaxis, yaxis)
+            
+    def can_draw_scrolled(self):
+        """
+        Returns True if the graph can be redrawn with draw_scrolled.
+        Fillings, value labels and x errorbars span columns that are
+        not redrawn, so graphs using them have to be redrawn entirely.
+        
+        @return: boolean.
+        """
+        if self._fill_to != None or self._show_value:
+            return False
+        if self._errors and self._draw_xerrors:
+            return False
+        return True
+        
+    def draw_scrolled(self, context, rect, xaxis, yaxis, highlighted_points, dx, redraw_from=None, title_x=None):
+        """
+        Update the graph after its previous rendering on context was
+        shifted left by dx px (strip chart mode). Only the columns at
+        the left border, where points left the visible range, and the
+        columns at the right border, where new points appeared, are
+        cleared and drawn again. If data was appended to the graph
+        since the previous rendering, redraw_from is the x value of the
+        last point that was drawn; the columns from there on are
+        drawn again too. title_x is the x position the title was drawn
+        at in the previous rendering (before it was shifted), the
+        columns from there on are drawn again as well.
+        
+        @type context: cairo.Context
+        @param context: The context to draw on.
+        @type rect: gtk.gdk.Rectangle
+        @param rect: A rectangle representing the charts area.
+        @type dx: int
+        @param dx: The number of px the rendering was shifted by.
+        @type redraw_from: float
+        @param redraw_from: None or the x value to redraw from.
+        @type title_x: float
+        @param title_x: None or the previous x position of the title.
+        
+        @return: a list of (x0, x1) pairs, the redrawn columns.
+        """
+        (xrange, yrange) = self._range_calc.get_ranges(xaxis, yaxis)
+        xfactor = rect.width * (1 - 2 * GRAPH_PADDING) / (xrange[1] - xrange[0])
+        left = rect.width * GRAPH_PADDING
+        right = rect.width * (1 - GRAPH_PADDING)
+        margin = self._point_size + 2
+        if type(self._point_style) == gtk.gdk.Pixbuf:
+            margin = max(self._point_style.get_width(), self._point_style.get_height()) / 2 + 2
+            
+        #the line from the first visible point to points that left the
+        #visible range has to disappear
+        left_end = left
+        for i in xrange(self._bisect_data(xrange[0]), len(self._data)):
+            x, y = self._data[i]
+            if yaxis.get_logarithmic():
+                y = math.log10(y)
+            if is_in_range(x, xrange) and is_in_range(y, yrange):
+                left_end = max(left_end, left + (x - xrange[0]) * xfactor)
+                break
+        right_start = right - dx
+        if title_x != None:
+            right_start = min(right_start, title_x - dx)
+        if redraw_from != None:
+            #the line from the last drawn point to the new points
+            right_start = min(right_start, left + (redraw_from - xrange[0]) * xfactor)
+        bands = [(0, int(left_end + margin) + 1), (int(right_start - margin) - 1, rect.width)]
+        
+        for (x0, x1) in bands:
+            #find the data window of the columns, including the points
+            #next to it that lines are drawn from
+            xa = xrange[0] + (x0 - margin - left) / xfactor
+            xb = xrange[0] + (x1 + margin - left) / xfactor
+            before, after = self._get_neighbours(xa, xb)
+            context.save()
+            context.rectangle(x0, 0, x1 - x0, rect.height)
+            context.clip()
+            context.set_operator(cairo.OPERATOR_CLEAR)
+            context.paint()
+            context.set_operator(cairo.OPERATOR_OVER)
+            self.draw(context, rect, xaxis, yaxis, highlighted_points, (before, after))
+            context.restore()
+        return bands
+        
+    def _bisect_data(self, x):
+        """
+        Returns the index of the first point with an x value >= x.
+        """
+        if isinstance(self._data, data_file.ColumnData):
+            return self._data._bisect(x)
+        return bisect_points(self._data, x)
+        
+    def _get_neighbours(self, xa, xb):
+        """
+        Returns the x value of the last point before xa and of the first
+        point after xb (xa and xb if there are no such points).
+        """
+        before, after = None, None
+        data = self._data
+        #found by bisection (calculated for RegularData)
+        i = self._bisect_data(xa)
+        if i > 0:
+            before = data[i - 1][0]
+        j = self._bisect_data(xb)
+        while j < len(data) and data[j][0] <= xb:
+            j += 1
+        if j < len(data):
+            after = data[j][0]
+        if before == None: before = xa
+        if after == None: after = xb
+        return before, after
 
     def get_x_range(self):
         """
@@ -1521,11 +2187,11 @@ class Graph(ChartObject):
 
         @return: pair of numbers
         """
-        try:
-            self._data.sort(lambda x, y: cmp(x[0], y[0]))
-            return (self._data[0][0], self._data[-1][0])
-        except:
+        if isinstance(self._data, data_file.ColumnData):
+            return self._data.get_x_range()
+        if not self._data:
             return None
+        return (self._data[0][0], self._data[-1][0])
 
     def get_y_range(self):
         """
@@ -1533,11 +2199,12 @@ class Graph(ChartObject):
 
         @return: pair of numbers
         """
-        try:
-            self._data.sort(lambda x, y: cmp(x[1], y[1]))
-            return (self._data[0][1], self._data[-1][1])
-        except:
-            return None
+        if isinstance(self._data, data_file.ColumnData):
+            return self._data.get_y_range()
+        if self._yrange == None and self._data:
+            ys = [point[1] for point in self._data]
+            self._yrange = (min(ys), max(ys))
+        return self._yrange
 
     def get_name(self):
         """
@@ -1729,19 +2396,68 @@ class Graph(ChartObject):
         (x, y, xerror, yerror). If you want only one error, set the
         other to zero. You can mix datapoints with and without error
         data in data_list.
+        
+        The new points are merged into the data so it stays sorted by
+        x (see merge_points). Appending points in x order is fastest.
 
         @type data_list: a list (see above).
         """
         new_data, new_errors = separate_data_and_errors(data_list)
-        self._data += new_data
-        self._errors = dict(self._errors, **new_errors)
+        if isinstance(self._data, data_file.ColumnData):
+            self._set_data(list(self._data), self._errors)
+        sort_points(new_data)
+        merge_points(self._data, new_data)
+        self._errors.update(new_errors)
+        if self._yrange != None and new_data:
+            ys = [point[1] for point in new_data]
+            self._yrange = (min(self._yrange[0], min(ys)), max(self._yrange[1], max(ys)))
+        self._data_revision += 1
         self._range_calc.add_graph(self)
+        self.emit("appearance_changed")
+        
+    def get_value_at(self, x):
+        """
+        Returns the y value of the point whose x value is closest to x
+        or None if the graph has no data. The point is found by
+        bisection, or calculated directly for data_file.RegularData.
+        
+        @type x: float
+        @param x: the x value
+        
+        @return: float.
+        """
+        if isinstance(self._data, data_file.ColumnData):
+            return self._data.get_value_at(x)
+        if not self._data:
+            return None
+        i = bisect_points(self._data, x)
+        if i == len(self._data) or (i > 0 and x - self._data[i - 1][0] <= self._data[i][0] - x):
+            i -= 1
+        return self._data[i][1]
+        
+    def get_data_revision(self):
+        """
+        Returns the revision of the data of the graph. It is increased
+        every time data is added.
+        
+        @return: int.
+        """
+        return self._data_revision
+        
+    def get_style_revision(self):
+        """
+        Returns the style revision of the graph. It is increased every
+        time a property of the graph is set.
+        
+        @return: int.
+        """
+        return self._style_revision
         
     def get_data(self):
         """
         Returns the data of the graph.
         
-        @return: a list of x, y pairs.
+        @return: a list of x, y pairs sorted by x.
         """
         return self._data
         
@@ -1857,7 +2573,127 @@ class Graph(ChartObject):
         return self.get_property("show-yerrors")
         
         
-def graph_new_from_function(func, xmin, xmax, graph_name, samples=100, do_optimize_sampling=True):
+class FunctionGraph(Graph):
+    """
+    A graph that shows the function y = func(x) with x in
+    [xmin, xmax]. Other than graphs created by graph_new_from_function,
+    the function is not sampled once but every time the visible
+    xrange or the size of the chart changes, with one sample per px
+    of the visible part of the domain. So zooming in (see
+    LineChart.set_xrange) always shows the details of the function.
+    
+    The samples are cached for the last cache_size combinations of
+    range and width. The automatic ranges of the chart are calculated
+    from samples evaluated at creation time (see
+    graph_new_from_function for how func is evaluated).
+    
+    Properties
+    ==========
+    The FunctionGraph class inherits properties from Graph.
+    
+    Signals
+    =======
+    The FunctionGraph class inherits signals from Graph.
+    """
+    
+    def __init__(self, name, title, func, xmin, xmax, samples=100, cache_size=16):
+        """
+        Create a new function graph.
+        
+        @type name: string
+        @param name: A unique name for the graph.
+        @type title: string
+        @param title: The graph's title.
+        @type func: a function
+        @param func: the function to show
+        @type xmin: float
+        @param xmin: the start of the domain of func
+        @type xmax: float
+        @param xmax: the end of the domain of func
+        @type samples: int
+        @param samples: number of samples used to calculate the ranges
+        @type cache_size: int
+        @param cache_size: number of cached samplings
+        """
+        self._func = func
+        self._domain = (xmin, xmax)
+        self._samples = samples
+        self._cache = LRUCache(cache_size)
+        self._sample_width = 0
+        Graph.__init__(self, name, title, self._get_range_samples())
+        
+    def _get_fingerprint_state(self):
+        #the function is hashed by its code, not by its address
+        return fingerprint_function(self._func), self._domain, self._data
+        
+    def _sample(self, xmin, xmax, n, logarithmic):
+        """
+        Returns n points of the function in [xmin, xmax] (in log10
+        space if logarithmic is True).
+        """
+        key = (xmin, xmax, n, logarithmic)
+        data = self._cache.get(key)
+        if data == None:
+            delta = (xmax - xmin) / float(n - 1)
+            xs = [xmin + i * delta for i in range(n - 1)] + [xmax]
+            if logarithmic:
+                xs = [10 ** x for x in xs]
+            data = zip(xs, evaluate_function(self._func, xs))
+            self._cache.set(key, data)
+        return data
+        
+    def _get_range_samples(self):
+        return self._sample(self._domain[0], self._domain[1], self._samples, False)
+        
+    def _get_visible_data(self, xrange, xaxis):
+        xmin, xmax = self._domain
+        if xaxis.get_logarithmic():
+            if xmin <= 0:
+                return []
+            xmin, xmax = math.log10(xmin), math.log10(xmax)
+        xmin, xmax = intersect_ranges(xrange, (xmin, xmax))
+        if xmin >= xmax:
+            return []
+        #one sample per px of the visible part of the domain
+        width = self._sample_width * (xmax - xmin) / (xrange[1] - xrange[0])
+        n = max(2, int(math.ceil(width)) + 1)
+        return self._sample(xmin, xmax, n, xaxis.get_logarithmic())
+        
+    def _do_draw(self, context, rect, xaxis, yaxis, highlighted_points, *args, **kwargs):
+        self._sample_width = rect.width * (1 - 2 * GRAPH_PADDING)
+        return Graph._do_draw(self, context, rect, xaxis, yaxis, highlighted_points, *args, **kwargs)
+        
+    def can_draw_scrolled(self):
+        #scrolling would keep samples of the old range
+        return False
+        
+    def add_data(self, data_list):
+        raise TypeError, "Data cannot be added to a FunctionGraph."
+        
+    def set_function(self, func):
+        """
+        Set the function the graph shows.
+        
+        @type func: a function
+        """
+        self._func = func
+        self._cache.clear()
+        self._set_data(self._get_range_samples(), {})
+        self._data_revision += 1
+        if self._range_calc != None:
+            self._range_calc.add_graph(self)
+        self.emit("appearance_changed")
+        
+    def get_function(self):
+        """
+        Returns the function the graph shows.
+        
+        @return: function.
+        """
+        return self._func
+        
+        
+def graph_new_from_function(func, xmin, xmax, graph_name, samples=100, do_optimize_sampling=True, processes=1):
     """
     Returns a line_chart.Graph with data created from the function
     y = func(x) with x in [xmin, xmax]. The id of the new graph is
@@ -1865,7 +2701,16 @@ def graph_new_from_function(func, xmin, xmax, graph_name, samples=100, do_optimi
     The parameter samples gives the number of points that should be
     evaluated in [xmin, xmax] (default: 100).
     If do_optimize_sampling is True (default) additional points will be
-    evaluated to smoothen the curve.
+    evaluated to smoothen the curve (see optimize_sampling).
+    
+    If numpy is installed and func works on numpy arrays (e.g. it only
+    uses numpy functions and arithmetic), all samples are evaluated
+    with a single call. Otherwise func is called for every x value.
+    
+    If func is expensive, set processes to evaluate it in a
+    multiprocessing pool with that many workers (None: number of
+    cpus). func then has to be defined at module level so it can be
+    pickled. The graph is the same as with processes=1 (default).
     
     @type func: a function
     @param func: the function to evaluate
@@ -1879,47 +2724,167 @@ def graph_new_from_function(func, xmin, xmax, graph_name, samples=100, do_optimi
     @param samples: number of samples
     @type do_optimize_sampling: boolean
     @param do_optimize_sampling: set whether to add additional points
+    @type processes: int
+    @param processes: number of worker processes
     
     @return: line_chart.Graph    
     """
     delta = (xmax - xmin) / float(samples - 1)
-    data = []
-    x = xmin
-    while x <= xmax:
-        data.append((x, func(x)))
-        x += delta
-        
-    if do_optimize_sampling:
-        data = optimize_sampling(func, data)
+    xs = [xmin + i * delta for i in range(samples - 1)] + [xmax]
+    pool = _create_pool(func, processes)
+    try:
+        data = zip(xs, evaluate_function(func, xs, pool))
+        if do_optimize_sampling:
+            data = _optimize_sampling(func, data, MAX_SAMPLING_ROUNDS, MAX_SAMPLING_POINTS, pool)
+    finally:
+        workers.close_pool(pool)
         
     return Graph(graph_name, "", data)
     
-def optimize_sampling(func, data):
-    new_data = []
-    prev_point = None
+def _create_pool(func, processes):
+    """
+    Returns a multiprocessing pool to evaluate func in, or None if
+    processes is 1 or a pool cannot be started.
+    """
+    if processes == 1:
+        return None
+    try:
+        pickle.dumps(func, 2)
+    except (pickle.PicklingError, TypeError):
+        raise ValueError, "The function has to be defined at module level to be evaluated in processes."
+    return workers.create_pool(processes)
+    
+def evaluate_function(func, xs, pool=None):
+    """
+    Returns the list [func(x) for x in xs]. If numpy is installed,
+    func is first called once with all x values as a numpy array; if
+    that fails or does not return one value per x, func is called for
+    every single x value.
+    
+    If pool is a multiprocessing pool, the x values are split into
+    chunks that are evaluated by its workers the same way, so the
+    result is the same as without a pool.
+    
+    @type func: a function
+    @param func: the function to evaluate
+    @type xs: list of floats
+    @param xs: the x values
+    @type pool: multiprocessing.Pool
+    @param pool: optional pool to evaluate func in
+    
+    @return: list of floats.
+    """
+    vectorize = numpy != None and len(xs) > 1
+    if pool == None or len(xs) < 2:
+        return _evaluate_chunk((func, xs, vectorize))
+    import multiprocessing
+    size = int(math.ceil(len(xs) / (4.0 * multiprocessing.cpu_count())))
+    jobs = [(func, xs[i:i + size], vectorize) for i in xrange(0, len(xs), size)]
+    ys = []
+    for chunk in pool.map(_evaluate_chunk, jobs):
+        ys.extend(chunk)
+    return ys
+    
+def _evaluate_chunk(job):
+    """
+    Evaluates a function for some x values, see evaluate_function.
+    job is a tuple (func, xs, vectorize). This function runs in the
+    worker processes if a pool is used.
+    """
+    func, xs, vectorize = job
+    if vectorize:
+        try:
+            ys = func(numpy.array(xs, numpy.float64))
+        except Exception:
+            ys = None
+        if isinstance(ys, numpy.ndarray) and ys.shape == (len(xs),):
+            return ys.tolist()
+    return [func(x) for x in xs]
+    
+def optimize_sampling(func, data, max_rounds=MAX_SAMPLING_ROUNDS, max_points=MAX_SAMPLING_POINTS, processes=1):
+    """
+    Adds points to the sampled function data where the curve bends:
+    if the slopes of two neighbouring segments differ by 0.1 or more,
+    the function is evaluated in the middle of the second segment.
+    
+    This is repeated in rounds: every round checks all segments,
+    evaluates the new x values at once (see evaluate_function) and
+    inserts the new points into the sorted data in a single pass. It
+    stops if no points were added, after max_rounds rounds or when
+    there are more than max_points points (the last round adds at
+    most one point per segment). If neither limit is reached, the
+    points are the same as with the recursive refinement of earlier
+    versions; functions with kinks or steep parts (e.g. abs, exp on a
+    wide range) are refined less than before.
+    
+    If processes is not 1, the new points of every round are
+    evaluated in a multiprocessing pool (see graph_new_from_function).
+    
+    @type func: a function
+    @param func: the sampled function
+    @type data: list of (x, y) pairs
+    @param data: the samples sorted by x
+    @type max_rounds: int
+    @param max_rounds: the maximum number of refinement rounds
+    @type max_points: int
+    @param max_points: stop refining if there are more points
+    @type processes: int
+    @param processes: number of worker processes
+    
+    @return: list of (x, y) pairs sorted by x.
+    """
+    pool = _create_pool(func, processes)
+    try:
+        return _optimize_sampling(func, data, max_rounds, max_points, pool)
+    finally:
+        workers.close_pool(pool)
+            
+def _optimize_sampling(func, data, max_rounds, max_points, pool):
+    data = list(data)
+    for i in range(max_rounds):
+        if len(data) > max_points:
+            break
+        positions = _get_refinement_positions(data)
+        if not positions:
+            break
+        xs = [data[j - 1][0] + (data[j][0] - data[j - 1][0]) / 2.0 for j in positions]
+        ys = evaluate_function(func, xs, pool)
+        data = _insert_points(data, positions, zip(xs, ys))
+    return data
+    
+def _get_refinement_positions(data):
+    """
+    Returns the indices j (ascending) of the points in data for which
+    a point should be inserted between data[j - 1] and data[j].
+    """
+    positions = []
     prev_slope = None
-    for x, y in data:
-        if prev_point != None:
-            if (x - prev_point[0]) == 0: return data
-            slope = (y - prev_point[1]) / (x - prev_point[0])
-            if prev_slope != None:
-                if abs(slope - prev_slope) >= 0.1:
-                    nx = prev_point[0] + (x - prev_point[0]) / 2.0
-                    ny = func(nx)
-                    new_data.append((nx, ny))
-                    #print abs(slope - prev_slope), prev_point[0], nx, x
-            prev_slope = slope
-        
-        prev_point = x, y
-    
-    if new_data:
-        data += new_data
-        data.sort(lambda x, y: cmp(x[0], y[0]))
-        return optimize_sampling(func, data)
-    else:
-        return data
-        
-def graph_new_from_file(filename, graph_name, x_col=0, y_col=1, xerror_col=-1, yerror_col=-1):
+    for j in range(1, len(data)):
+        dx = data[j][0] - data[j - 1][0]
+        if dx == 0:
+            #the segments cannot be divided any further
+            return []
+        slope = (data[j][1] - data[j - 1][1]) / dx
+        if prev_slope != None and abs(slope - prev_slope) >= 0.1:
+            positions.append(j)
+        prev_slope = slope
+    return positions
+    
+def _insert_points(data, positions, points):
+    """
+    Inserts the points into data, points[k] before
+    data[positions[k]]. positions has to be ascending.
+    """
+    result = []
+    last = 0
+    for j, point in zip(positions, points):
+        result.extend(data[last:j])
+        result.append(point)
+        last = j
+    result.extend(data[last:])
+    return result
+        
+def graph_new_from_file(filename, graph_name, x_col=0, y_col=1, xerror_col=-1, yerror_col=-1, cache_dir=None):
     """
     Returns a line_chart.Graph with point taken from data file
     filename.
@@ -1928,6 +2893,10 @@ def graph_new_from_file(filename, graph_name, x_col=0, y_col=1, xerror_col=-1, y
     Data file format:
     The columns in the file have to be separated by tabs or one
     or more spaces. Everything after '#' is ignored (comment).
+    The file is parsed in chunks (with numpy if it is installed), see
+    the data_file module. If cache_dir is given, the parsed columns are
+    stored in that directory and memory-mapped from there as long as
+    the file does not change.
     
     Use the parameters x_col and y_col to control which columns to use
     for plotting. By default, the first column (x_col=0) is used for
@@ -1949,50 +2918,332 @@ def graph_new_from_file(filename, graph_name, x_col=0, y_col=1, xerror_col=-1, y
     @param xerror_col: index of the column for x error values
     @type yerror_col: int
     @param yerror_col: index of the column for y error values
+    @type cache_dir: string
+    @param cache_dir: optional directory to cache the parsed data in
     
     @return: line_chart.Graph
     """
-    points = []
-    f = open(filename, "r")
-    data = f.read()
-    f.close()
-    lines = data.split("\n")
-    
-    for line in lines:
-        line = line.strip() #remove special characters at beginning and end
-        
-        #remove comments:
-        a = line.split("#", 1)
-        if a and a[0]:
-            line = a[0]
-            #get data from line:
-            if line.find("\t") != -1:
-                #col separator is tab
-                d = line.split("\t")
-            else:
-                #col separator is one or more space
-                #normalize to one space:
-                while line.find("  ") != -1:
-                    line = line.replace("  ", " ")
-                d = line.split(" ")
-            d = filter(lambda x: x, d)
-            d = map(lambda x: float(x), d)
+    columns = _get_file_columns(x_col, y_col, xerror_col, yerror_col)
+    values = data_file.read_columns(filename, columns, cache_dir=cache_dir)
+    return Graph(graph_name, "", _points_from_columns(values, xerror_col, yerror_col))
+    
+def graphs_new_from_file(filename, y_cols, x_col=0, header=False, names=None, cache_dir=None):
+    """
+    Returns a list of line_chart.Graphs, one for every column in
+    y_cols, with data from the data file filename. The file is only
+    read and parsed once, however many graphs are created, and all
+    graphs share the same array of x values.
+    
+    The file format is the same as for graph_new_from_file. If header
+    is True, the first non-empty line of the file has to contain the
+    names of the columns (it may start with '#'). The columns can
+    then be given by name, and the names are used as names and
+    titles of the graphs.
+    
+    @type filename: string
+    @param filename: path to the data file
+    @type y_cols: list of ints (or strings if header is True)
+    @param y_cols: the columns to use for y values, one per graph
+    @type x_col: int (or string if header is True)
+    @param x_col: the column to use for x values
+    @type header: boolean
+    @param header: set whether the file has a header line
+    @type names: list of strings
+    @param names: unique names for the graphs (default: the column
+    names from the header or the column indices)
+    @type cache_dir: string
+    @param cache_dir: optional directory to cache the parsed data in
+    (see graph_new_from_file)
+    
+    @return: list of line_chart.Graph
+    """
+    columns = [x_col] + list(y_cols)
+    if header:
+        column_names, values = data_file.read_columns_with_header(filename, columns, cache_dir=cache_dir)
+    else:
+        column_names, values = None, data_file.read_columns(filename, columns, cache_dir=cache_dir)
+    #all graphs share the x column, so the columns are sorted together
+    values = data_file.sort_columns(values)
+    xs = values[0]
+    graphs = []
+    for i, col in enumerate(y_cols):
+        if names != None:
+            name, title = names[i], ""
+        elif column_names != None:
+            if type(col) not in (str, unicode):
+                col = column_names[col]
+            name, title = col, col
+        else:
+            name, title = str(col), ""
+        data = data_file.ColumnData(xs, values[i + 1])
+        graphs.append(Graph(name, title, data))
+    return graphs
+    
+def graphs_new_from_files(filenames, names=None, x_col=0, y_col=1, xerror_col=-1, yerror_col=-1, processes=None, cache_dir=None):
+    """
+    Returns line_chart.Graphs for many data files at once, one graph
+    per file. The files are parsed in parallel in a multiprocessing
+    pool with processes workers (default: number of cpus), see
+    data_file.read_many_columns. The file format and the column
+    parameters are the same as for graph_new_from_file.
+    
+    A file that cannot be read does not stop the other files from
+    loading, its error is returned instead.
+    
+    Example:
+    
+    graphs, errors = graphs_new_from_files(filenames)
+    for graph in graphs:
+        chart.add_graph(graph)
+    for filename, error in errors:
+        print filename, error
+    
+    @type filenames: list of strings
+    @param filenames: paths to the data files
+    @type names: list of strings
+    @param names: unique names for the graphs (default: the filenames)
+    @type x_col: int
+    @param x_col: the number of the column to use for x values
+    @type y_col: int
+    @param y_col: the number of the column to use for y values
+    @type xerror_col: int
+    @param xerror_col: index of the column for x error values
+    @type yerror_col: int
+    @param yerror_col: index of the column for y error values
+    @type processes: int
+    @param processes: number of worker processes
+    @type cache_dir: string
+    @param cache_dir: optional directory to cache the parsed data in
+    
+    @return: a (graphs, errors) tuple. graphs is a list of
+    line_chart.Graph in the order of filenames (files with errors are
+    left out), errors is a list of (filename, error) tuples, error is
+    a string with the traceback.
+    """
+    filenames = list(filenames)
+    if names == None:
+        names = filenames
+    columns = _get_file_columns(x_col, y_col, xerror_col, yerror_col)
+    results = data_file.read_many_columns(filenames, columns, processes, cache_dir)
+    graphs = []
+    errors = []
+    for filename, name, (values, error) in zip(filenames, names, results):
+        if error != None:
+            errors.append((filename, error))
+        elif xerror_col == -1 and yerror_col == -1:
+            xs, ys = data_file.sort_columns(values)
+            graphs.append(Graph(name, "", data_file.ColumnData(xs, ys)))
+        else:
+            graphs.append(Graph(name, "", _points_from_columns(values, xerror_col, yerror_col)))
+    return graphs, errors
+    
+def _get_file_columns(x_col, y_col, xerror_col, yerror_col):
+    columns = [x_col, y_col]
+    for col in (xerror_col, yerror_col):
+        if col != -1:
+            columns.append(col)
+    return columns
+    
+def _points_from_columns(values, xerror_col, yerror_col):
+    """
+    Returns a list of points for Graph from the columns read by
+    data_file (see _get_file_columns for the order of the columns).
+    """
+    values = [column.tolist() for column in values]
+    xs, ys = values[0], values[1]
+    if xerror_col == -1 and yerror_col == -1:
+        return zip(xs, ys)
+    xerrors = yerrors = [0] * len(xs)
+    if xerror_col != -1:
+        xerrors = values[2]
+    if yerror_col != -1:
+        yerrors = values[-1]
+    return zip(xs, ys, xerrors, yerrors)
+
+def graph_new_from_binary(x_filename, y_filename, graph_name, dtype="float64", x_sorted=True):
+    """
+    Returns a line_chart.Graph that draws directly from two
+    memory-mapped binary column files, one for the x values and one
+    for the y values. The files are not read when the graph is
+    created; when it is drawn, only the part of the files in the
+    visible x range is accessed. If x_sorted is False, the columns
+    are read and sorted by x when the graph is created.
+    The y values are only read all at once (to find their range) if
+    the visible yrange of the chart is RANGE_AUTO.
+    
+    A column file is either a 1-dimensional .npy file or contains
+    raw little-endian values of type dtype. See the data_file module.
+    
+    @type x_filename: string
+    @param x_filename: path to the column file with the x values
+    @type y_filename: string
+    @param y_filename: path to the column file with the y values
+    @type graph_name: string
+    @param graph_name: a unique name for the graph
+    @type dtype: string
+    @param dtype: 'float64' (default) or 'float32', the type of the
+    values in raw column files
+    @type x_sorted: boolean
+    @param x_sorted: set whether the x values are in ascending order
+    
+    @return: line_chart.Graph
+    """
+    data = data_file.ColumnData(data_file.open_column(x_filename, dtype),
+                                data_file.open_column(y_filename, dtype),
+                                x_sorted)
+    return Graph(graph_name, "", data)
+
+
+class FollowedFile:
+    """
+    This class follows a data file that is continuously appended to
+    (e.g. by a logger) and adds the new data points to a graph.
+    
+    The file is polled every interval milliseconds. Only the bytes
+    appended since the last poll are read, and only complete lines
+    are parsed; an incomplete last line is kept until the rest of it
+    is written. The new bytes are read and parsed in chunks of
+    data_file.CHUNK_SIZE bytes, so reading a large file from the
+    start does not need memory for all of its text. All new points
+    of a poll are added to the graph with
+    one Graph.add_data call, so the chart is updated once per poll.
+    Lines that cannot be parsed are skipped. If the file gets
+    shorter (it was truncated or replaced), it is read from the start
+    again.
+    
+    The file format and the column parameters are the same as for
+    graph_new_from_file.
+    
+    Example:
+    
+    graph = line_chart.Graph("log", "Log", [])
+    chart.add_graph(graph)
+    follower = line_chart.FollowedFile("data.log", graph)
+    """
+    
+    def __init__(self, filename, graph, x_col=0, y_col=1, xerror_col=-1, yerror_col=-1, interval=500, from_start=True):
+        """
+        Create a new FollowedFile and start following the file.
+        
+        @type filename: string
+        @param filename: path to the data file
+        @type graph: line_chart.Graph
+        @param graph: the graph to add the data to
+        @type interval: int
+        @param interval: the time between two polls in ms
+        @type from_start: boolean
+        @param from_start: If True (default), the data already in the
+        file is added on the first poll, otherwise only lines that are
+        appended later.
+        """
+        self._filename = filename
+        self._graph = graph
+        self._xerror_col = xerror_col
+        self._yerror_col = yerror_col
+        self._columns = _get_file_columns(x_col, y_col, xerror_col, yerror_col)
+        self._interval = interval
+        self._offset = 0
+        self._remainder = ""
+        self._source = None
+        if not from_start and os.path.exists(filename):
+            self._offset = os.path.getsize(filename)
+        self.start()
+        
+    def start(self):
+        """
+        Start polling the file (this is done automatically when the
+        FollowedFile is created).
+        """
+        if self._source == None:
+            self._source = gobject.timeout_add(self._interval, self._cb_poll)
             
-            new_data = (d[x_col], d[y_col])
+    def stop(self):
+        """
+        Stop polling the file.
+        """
+        if self._source != None:
+            gobject.source_remove(self._source)
+            self._source = None
             
-            if xerror_col != -1 or yerror_col != -1:
-                xerror = 0
-                yerror = 0
-                
-                if xerror_col != -1:
-                    xerror = d[xerror_col]
-                if yerror_col != -1:
-                    yerror = d[yerror_col]
-                
-                new_data = (d[x_col], d[y_col], xerror, yerror)
-                
-            points.append(new_data)
-    return Graph(graph_name, "", points)
+    def get_graph(self):
+        """
+        Returns the graph the data is added to.
+        
+        @return: line_chart.Graph.
+        """
+        return self._graph
+        
+    def _cb_poll(self):
+        self.poll()
+        return True
+        
+    def _read_new_lines(self):
+        """
+        Yields the complete lines that were appended to the file since
+        the last poll, in lists of about data_file.CHUNK_SIZE bytes.
+        The file is read in binary mode, so the offset is the number of
+        bytes read.
+        """
+        try:
+            f = open(self._filename, "rb")
+        except IOError:
+            return
+        try:
+            if os.fstat(f.fileno()).st_size < self._offset:
+                self._offset = 0
+                self._remainder = ""
+            f.seek(self._offset)
+            while True:
+                data = f.read(data_file.CHUNK_SIZE)
+                if not data:
+                    break
+                self._offset += len(data)
+                data = self._remainder + data
+                end = data.rfind("\n") + 1
+                self._remainder = data[end:]
+                if end > 0:
+                    yield data[:end].splitlines(True)
+        finally:
+            f.close()
+        
+    def _parse_lines(self, lines):
+        try:
+            return data_file.parse_lines(lines, self._columns)
+        except (ValueError, IndexError):
+            #skip the lines that cannot be parsed
+            chunks = []
+            for line in lines:
+                try:
+                    chunk = data_file.parse_lines([line], self._columns)
+                except (ValueError, IndexError):
+                    continue
+                if chunk != None:
+                    chunks.append(chunk)
+            if not chunks:
+                return None
+            return [data_file.join_columns([chunk[i] for chunk in chunks]) for i in range(len(self._columns))]
+        
+    def poll(self):
+        """
+        Read the lines that were appended to the file since the last
+        poll and add their points to the graph. This is called
+        automatically every interval ms.
+        
+        @return: the number of added points.
+        """
+        chunks = []
+        for lines in self._read_new_lines():
+            chunk = self._parse_lines(lines)
+            if chunk != None:
+                chunks.append(chunk)
+        if not chunks:
+            return 0
+        values = [data_file.join_columns([chunk[i] for chunk in chunks]) for i in range(len(self._columns))]
+        if len(values[0]) == 0:
+            return 0
+        points = _points_from_columns(values, self._xerror_col, self._yerror_col)
+        self._graph.add_data(points)
+        return len(points)
 
 
 class Legend(ChartObject):
@@ -379,6 +379,10 @@ class BarGroup(ChartObject):
         if bar.get_color() == COLOR_AUTO:
             bar.set_color(COLORS[len(self._bars) % len(COLORS)])
         self._bars.append(bar)
+        bar.connect("appearance_changed", self._cb_appearance_changed)
+        self.emit("appearance_changed")
+        
+    def _cb_appearance_changed(self, bar):
         self.emit("appearance_changed")
         
     def get_value_label_size(self, context, rect, mode, bar_count, n, group_padding, bar_padding):
@@ -595,7 +599,7 @@ class MultiBarChart(bar_chart.BarChart):
         label.begin_drawing()
         chart.init_sensitive_areas()
         
-        rect = self.get_allocation()
+        rect = self._get_render_rect()
         rect = gtk.gdk.Rectangle(0, 0, rect.width, rect.height) #transform rect to context coordinates
         context.set_line_width(1)
                                     
@@ -628,7 +632,8 @@ class MultiBarChart(bar_chart.BarChart):
         elif self._mode == MODE_HORIZONTAL:
             minimum_width = rect.x + self._padding + 200
             minimum_height = rect.y + self._padding + bar_count * 10 + n * self._group_padding
-        self.set_size_request(minimum_width, minimum_height)
+        if self._render_rect == None:
+            self.set_size_request(minimum_width, minimum_height)
     
     #other methods        
     def add_group(self, group):
@@ -638,6 +643,7 @@ class MultiBarChart(bar_chart.BarChart):
         @type group: multi_bar_chart.BarGroup.
         """
         self._groups.append(group)
+        group.connect("appearance_changed", self._cb_appearance_changed)
         self.queue_draw()
         
     def add_bar(self, bar):
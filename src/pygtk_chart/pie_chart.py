@@ -217,9 +217,6 @@ class PieChart(chart.Chart):
         else:
             raise AttributeError, "Property %s does not exist." % property.name
             
-    def _cb_appearance_changed(self, widget):
-        self.queue_draw()
-        
     def _cb_motion_notify(self, widget, event):
         if not self._enable_mouseover: return
         area = self._get_area_at_pos(event.x, event.y)
@@ -290,10 +287,10 @@ class PieChart(chart.Chart):
         """
         label.begin_drawing()
         
-        rect = self.get_allocation()
+        rect = self._get_render_rect()
         #initial context settings: line width & font
         context.set_line_width(1)
-        font = gtk.Label().style.font_desc.get_family()
+        font = get_font_description().get_family()
         context.select_font_face(font, cairo.FONT_SLANT_NORMAL, \
                                     cairo.FONT_WEIGHT_NORMAL)
 
@@ -336,6 +333,7 @@ class PieChart(chart.Chart):
         if color == COLOR_AUTO: area.set_color(COLORS[len(self._areas) % len(COLORS)])
         self._areas.append(area)
         area.connect("appearance_changed", self._cb_appearance_changed)
+        self.queue_draw()
         
     def get_pie_area(self, name):
         """
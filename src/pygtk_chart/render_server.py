@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+#
+#       render_server.py
+#
+#       Copyright 2009 Sven Festersen <sven@sven-festersen.de>
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+"""
+A small HTTP server that renders charts. Clients POST a JSON object
+to /render:
+
+{"chart": <chart specification, see the spec module>,
+ "size": [width, height],
+ "format": "png"}
+
+'size' and 'format' are optional (default: 400x300 png, the formats
+are chart.EXPORT_FORMATS). The answer is the image data.
+
+The charts are rendered in a pool of worker processes that is started
+once, so a request does not pay for starting python and importing gtk.
+Rendered images are cached in memory, keyed by a hash of the request,
+and sent with that hash as ETag. Repeated requests are answered from
+the cache (or with '304 Not Modified' if the client sends
+If-None-Match) without rendering again.
+
+Start the server with:
+
+python -m pygtk_chart.render_server --port 8080
+
+Author: Sven Festersen (sven@sven-festersen.de)
+"""
+__docformat__ = "epytext"
+import BaseHTTPServer
+import SocketServer
+import hashlib
+import optparse
+import threading
+import traceback
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from pygtk_chart.chart import EXPORT_FORMATS
+from pygtk_chart.export_cache import LRUCache
+from pygtk_chart import workers
+from pygtk_chart.spec import chart_new_from_spec
+
+DEFAULT_SIZE = (400, 300)
+DEFAULT_FORMAT = "png"
+CONTENT_TYPES = {"png": "image/png",
+                    "svg": "image/svg+xml",
+                    "pdf": "application/pdf"}
+
+
+def render_request(request):
+    """
+    Renders the chart described by a normalized request (see
+    RenderServer.parse_request). This function runs in the worker
+    processes.
+
+    @return: a (data, error) tuple, error is None or a string with the
+    traceback.
+    """
+    try:
+        chart = chart_new_from_spec(request["chart"])
+        return chart.export_data(request["format"], request["size"]), None
+    except Exception:
+        return None, traceback.format_exc()
+
+
+class RenderServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    The chart render server. Every request is handled in its own
+    thread, the rendering is done in a multiprocessing pool (or in the
+    server process if processes is 1 or a pool cannot be started).
+    Identical requests that arrive while a chart is rendered wait for
+    that chart instead of rendering it again.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, processes=None, cache_size=256):
+        #the workers are started before the socket is opened so they
+        #do not inherit it
+        self._pool = workers.create_pool(processes)
+        BaseHTTPServer.HTTPServer.__init__(self, address, RenderRequestHandler)
+        self.cache = LRUCache(cache_size)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+
+    def parse_request(self, body):
+        """
+        Parses the JSON request body and fills in the defaults.
+
+        @return: a (key, request) tuple, key is the hash of the request.
+        """
+        data = json.loads(body)
+        if not isinstance(data, dict) or not isinstance(data.get("chart", None), dict):
+            raise ValueError, "The request has to be an object with a 'chart' key."
+        format = data.get("format", DEFAULT_FORMAT)
+        if format not in EXPORT_FORMATS:
+            raise ValueError, "Unknown export format: %s" % format
+        width, height = data.get("size", DEFAULT_SIZE)
+        request = {"chart": data["chart"], "format": format,
+                    "size": (int(width), int(height))}
+        key = hashlib.sha1(json.dumps(request, sort_keys=True)).hexdigest()
+        return key, request
+
+    def render(self, key, request):
+        """
+        Returns the rendered chart for request from the cache or
+        renders it.
+
+        @return: a (data, error) tuple.
+        """
+        data = self.cache.get(key)
+        if data != None:
+            return data, None
+        self._pending_lock.acquire()
+        event = self._pending.get(key, None)
+        owner = event == None
+        if owner:
+            event = threading.Event()
+            self._pending[key] = event
+        self._pending_lock.release()
+        if not owner:
+            event.wait()
+            data = self.cache.get(key)
+            if data != None:
+                return data, None
+        try:
+            if self._pool != None:
+                data, error = self._pool.apply(render_request, (request,))
+            else:
+                data, error = render_request(request)
+            if data != None:
+                self.cache.set(key, data)
+            return data, error
+        finally:
+            if owner:
+                self._pending_lock.acquire()
+                del self._pending[key]
+                self._pending_lock.release()
+                event.set()
+
+    def server_close(self):
+        BaseHTTPServer.HTTPServer.server_close(self)
+        workers.close_pool(self._pool)
+        self._pool = None
+
+
+class RenderRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/render":
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            key, request = self.server.parse_request(self.rfile.read(length))
+        except Exception, e:
+            self.send_error(400, str(e))
+            return
+        etag = '"%s"' % key
+        if self.headers.get("If-None-Match", None) == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        data, error = self.server.render(key, request)
+        if data == None:
+            self.send_error(500, error.strip().split("\n")[-1])
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES[request["format"]])
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main():
+    parser = optparse.OptionParser(usage="%prog [options]")
+    parser.add_option("--host", default="127.0.0.1",
+                        help="address to listen on (default: %default)")
+    parser.add_option("--port", type="int", default=8080,
+                        help="port to listen on (default: %default)")
+    parser.add_option("--processes", type="int", default=None,
+                        help="number of render processes (default: number of cpus)")
+    parser.add_option("--cache-size", type="int", default=256,
+                        help="number of cached charts (default: %default)")
+    options, args = parser.parse_args()
+    server = RenderServer((options.host, options.port), options.processes,
+                            options.cache_size)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+if __name__ == "__main__":
+    main()
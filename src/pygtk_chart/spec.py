@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+#
+#       spec.py
+#
+#       Copyright 2009 Sven Festersen <sven@sven-festersen.de>
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+"""
+This module creates charts from chart specifications. A chart
+specification is a dict that only contains strings, numbers, lists and
+dicts, so it can be pickled or read from JSON.
+
+Every specification has a 'type' ('line', 'bar', 'multi_bar' or
+'pie'). Optional keys for all types are 'title' (string) and
+'background' (html color string).
+
+Line charts:
+ - graphs: a list of graph specifications (see below)
+ - xrange, yrange: a pair of numbers
+ - xlabel, ylabel: strings
+ - legend: boolean
+A graph specification has the keys 'name' and 'data' (a list of
+[x, y] or [x, y, xerror, yerror] lists), optional keys are 'title',
+'color' (html color string) and 'type' ('points', 'lines' or 'both').
+
+Bar charts:
+ - bars: a list of bar specifications with the keys 'name' and
+   'value' and the optional keys 'label' and 'color'
+ - mode: 'vertical' or 'horizontal'.
+
+Multi bar charts:
+ - groups: a list of group specifications with the key 'name', the
+   optional key 'title' and the key 'bars' (as for bar charts)
+ - mode: 'vertical' or 'horizontal'.
+
+Pie charts:
+ - areas: a list of area specifications with the keys 'name' and
+   'value' and the optional keys 'label' and 'color'.
+
+Author: Sven Festersen (sven@sven-festersen.de)
+"""
+__docformat__ = "epytext"
+import gtk
+
+from pygtk_chart import bar_chart
+from pygtk_chart import line_chart
+from pygtk_chart import multi_bar_chart
+from pygtk_chart import pie_chart
+
+GRAPH_TYPES = {"points": line_chart.GRAPH_POINTS,
+                "lines": line_chart.GRAPH_LINES,
+                "both": line_chart.GRAPH_BOTH}
+BAR_MODES = {"vertical": bar_chart.MODE_VERTICAL,
+                "horizontal": bar_chart.MODE_HORIZONTAL}
+
+
+def chart_new_from_spec(spec):
+    """
+    Returns a new chart widget described by spec. spec is either a
+    chart specification (see above) or a function without arguments
+    that returns a chart.
+
+    @type spec: dict or function
+    @param spec: the chart specification
+
+    @return: chart.Chart
+    """
+    if callable(spec):
+        return spec()
+    chart_type = spec.get("type", "line")
+    if chart_type == "line":
+        chart = _line_chart_new_from_spec(spec)
+    elif chart_type == "bar":
+        chart = _bar_chart_new_from_spec(spec)
+    elif chart_type == "multi_bar":
+        chart = _multi_bar_chart_new_from_spec(spec)
+    elif chart_type == "pie":
+        chart = _pie_chart_new_from_spec(spec)
+    else:
+        raise ValueError, "Unknown chart type: %s" % chart_type
+    if "title" in spec:
+        chart.title.set_text(spec["title"])
+    if "background" in spec:
+        chart.background.set_color(gtk.gdk.color_parse(spec["background"]))
+    return chart
+
+def _set_area_spec(area, spec):
+    if "color" in spec:
+        area.set_color(gtk.gdk.color_parse(spec["color"]))
+
+def _line_chart_new_from_spec(spec):
+    chart = line_chart.LineChart()
+    chart.freeze_update()
+    for graph_spec in spec.get("graphs", []):
+        graph = line_chart.Graph(graph_spec["name"], graph_spec.get("title", ""),
+                                    [tuple(point) for point in graph_spec["data"]])
+        if "color" in graph_spec:
+            graph.set_color(gtk.gdk.color_parse(graph_spec["color"]))
+        if "type" in graph_spec:
+            graph.set_type(GRAPH_TYPES[graph_spec["type"]])
+        chart.add_graph(graph)
+    if "xrange" in spec:
+        chart.set_xrange(tuple(spec["xrange"]))
+    if "yrange" in spec:
+        chart.set_yrange(tuple(spec["yrange"]))
+    if "xlabel" in spec:
+        chart.xaxis.set_label(spec["xlabel"])
+    if "ylabel" in spec:
+        chart.yaxis.set_label(spec["ylabel"])
+    if "legend" in spec:
+        chart.legend.set_visible(spec["legend"])
+    chart.thaw_update()
+    return chart
+
+def _bar_chart_new_from_spec(spec):
+    chart = bar_chart.BarChart()
+    for bar_spec in spec.get("bars", []):
+        bar = bar_chart.Bar(bar_spec["name"], bar_spec["value"], bar_spec.get("label", ""))
+        _set_area_spec(bar, bar_spec)
+        chart.add_bar(bar)
+    if "mode" in spec:
+        chart.set_mode(BAR_MODES[spec["mode"]])
+    return chart
+
+def _multi_bar_chart_new_from_spec(spec):
+    chart = multi_bar_chart.MultiBarChart()
+    for group_spec in spec.get("groups", []):
+        group = multi_bar_chart.BarGroup(group_spec["name"], group_spec.get("title", ""))
+        for bar_spec in group_spec.get("bars", []):
+            bar = multi_bar_chart.Bar(bar_spec["name"], bar_spec["value"], bar_spec.get("label", ""))
+            _set_area_spec(bar, bar_spec)
+            group.add_bar(bar)
+        chart.add_group(group)
+    if "mode" in spec:
+        chart.set_mode(BAR_MODES[spec["mode"]])
+    return chart
+
+def _pie_chart_new_from_spec(spec):
+    chart = pie_chart.PieChart()
+    for area_spec in spec.get("areas", []):
+        area = pie_chart.PieArea(area_spec["name"], area_spec["value"], area_spec.get("label", ""))
+        _set_area_spec(area, area_spec)
+        chart.add_area(area)
+    return chart
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+#
+#       workers.py
+#
+#       Copyright 2009 Sven Festersen <sven@sven-festersen.de>
+#
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+"""
+This module contains helpers for the modules that work in several
+processes: starting and closing multiprocessing pools (with a
+fallback to this process) and writing files that other processes may
+read at the same time.
+
+Author: Sven Festersen (sven@sven-festersen.de)
+"""
+__docformat__ = "epytext"
+import os
+import tempfile
+
+
+def create_pool(processes=None, jobs=None):
+    """
+    Starts a multiprocessing pool with processes workers (default:
+    number of cpus). Returns None if processes is 1, if there are
+    less than two jobs (if the number of jobs is given) or if a pool
+    cannot be started; the work has to be done in this process then.
+
+    @type processes: int
+    @param processes: number of worker processes
+    @type jobs: int
+    @param jobs: optional number of jobs for the pool
+
+    @return: multiprocessing.Pool or None.
+    """
+    if processes == 1 or (jobs != None and jobs < 2):
+        return None
+    try:
+        import multiprocessing
+        return multiprocessing.Pool(processes)
+    except (ImportError, OSError, NotImplementedError):
+        return None
+
+def close_pool(pool):
+    """
+    Closes a pool returned by create_pool and waits for its workers
+    to exit. Nothing is done if pool is None.
+
+    @type pool: multiprocessing.Pool
+    @param pool: the pool to close
+    """
+    if pool != None:
+        pool.close()
+        pool.join()
+
+def map_jobs(function, jobs, processes=None, chunksize=1):
+    """
+    Returns [function(job) for job in jobs]. The jobs are done in a
+    pool with processes workers (see create_pool) or, if there is no
+    pool, one after another in this process. function has to be
+    defined at module level so it can be pickled.
+
+    @type function: a function
+    @param function: the function to call for every job
+    @type jobs: list
+    @param jobs: the arguments of the calls
+    @type processes: int
+    @param processes: number of worker processes
+    @type chunksize: int
+    @param chunksize: number of jobs sent to a worker at once
+
+    @return: list.
+    """
+    jobs = list(jobs)
+    pool = create_pool(processes, len(jobs))
+    if pool == None:
+        return map(function, jobs)
+    try:
+        return pool.map(function, jobs, chunksize)
+    finally:
+        close_pool(pool)
+
+def write_atomically(directory, name, write_function):
+    """
+    Creates the file name in directory by calling write_function with
+    a file object. The data is written to a temporary file that is
+    renamed when it is complete, so other processes never read a
+    partly written file.
+
+    @type directory: string
+    @param directory: the directory of the file
+    @type name: string
+    @param name: the name of the file
+    @param write_function: a function that writes the data to the
+    file object it is called with
+    """
+    fd, path = tempfile.mkstemp(dir=directory)
+    try:
+        f = os.fdopen(fd, "wb")
+        try:
+            write_function(f)
+        finally:
+            f.close()
+        os.rename(path, os.path.join(directory, name))
+    except:
+        os.remove(path)
+        raise
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+#
+#       test_chart.py
+#       
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#       
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#       
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+try:
+    import cairo
+    import gtk
+except ImportError:
+    gtk = None
+
+if gtk != None:
+    from pygtk_chart import chart
+    from pygtk_chart import line_chart
+
+
+@unittest.skipIf(gtk == None, "pygtk is not installed")
+class CachedDrawingTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        
+    def test_pixbuf_background(self):
+        #a red background image
+        filename = os.path.join(self.tmpdir, "background.png")
+        image = cairo.ImageSurface(cairo.FORMAT_RGB24, 20, 20)
+        context = cairo.Context(image)
+        context.set_source_rgb(1, 0, 0)
+        context.paint()
+        image.write_to_png(filename)
+        
+        c = line_chart.LineChart()
+        c.title.set_visible(False)
+        c.background.set_image(filename)
+        c.add_graph(line_chart.Graph("g", "g", [(0, 0), (1, 1), (2, 4)]))
+        c.size_allocate(gtk.gdk.Rectangle(0, 0, 200, 150))
+        
+        #the offscreen cache surface is drawn exactly like in an expose
+        surface = cairo.ImageSurface(cairo.FORMAT_RGB24, 200, 150)
+        c._draw_cache(chart.create_context(surface))
+        self.assertTrue("background" in c._layers)
+        self.assertTrue("graph:g" in c._layers)
+        
+        #paint again from the cached layers
+        surface = cairo.ImageSurface(cairo.FORMAT_RGB24, 200, 150)
+        c._draw_cache(chart.create_context(surface))
+        surface.flush()
+        data = surface.get_data()
+        if sys.byteorder == "little":
+            self.assertEqual(data[0:3], "\x00\x00\xff")
+        else:
+            self.assertEqual(data[1:4], "\xff\x00\x00")
+        
+        
+if __name__ == "__main__":
+    unittest.main()
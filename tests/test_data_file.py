@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+#
+#       test_data_file.py
+#       
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#       
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#       
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+try:
+    import gtk
+except ImportError:
+    gtk = None
+
+if gtk != None:
+    from pygtk_chart import data_file
+
+
+@unittest.skipIf(gtk == None, "pygtk is not installed")
+class UnsortedFileTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "data.txt")
+        f = open(self.filename, "w")
+        for x in (3, 1, 4, 1.5, 9, 2, 6):
+            f.write("%s %s %s\n" % (x, 10 * x, -x))
+        f.close()
+        
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        
+    def test_sort_columns(self):
+        values = data_file.read_columns(self.filename, [0, 1, 2])
+        self.assertFalse(data_file.is_sorted(values[0]))
+        xs, ys, zs = data_file.sort_columns(values)
+        self.assertEqual(list(xs), [1, 1.5, 2, 3, 4, 6, 9])
+        self.assertEqual(list(ys), [10 * x for x in xs])
+        self.assertEqual(list(zs), [-x for x in xs])
+        
+    def test_sorted_columns_are_kept(self):
+        values = data_file.read_columns(self.filename, [1, 1])
+        values = data_file.sort_columns(values)
+        self.assertTrue(data_file.sort_columns(values) is values)
+        
+    def test_column_data_get_sorted(self):
+        xs, ys = data_file.read_columns(self.filename, [0, 1])
+        data = data_file.ColumnData(xs, ys, False).get_sorted()
+        self.assertEqual([x for (x, y) in data], [1, 1.5, 2, 3, 4, 6, 9])
+        self.assertEqual(data.get_window(1.7, 4.5)[0], (2, 20))
+        self.assertEqual(data.get_value_at(5.8), 60)
+        
+        
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+#
+#       test_line_chart.py
+#       
+#       This program is free software; you can redistribute it and/or modify
+#       it under the terms of the GNU General Public License as published by
+#       the Free Software Foundation; either version 2 of the License, or
+#       (at your option) any later version.
+#       
+#       This program is distributed in the hope that it will be useful,
+#       but WITHOUT ANY WARRANTY; without even the implied warranty of
+#       MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#       GNU General Public License for more details.
+#       
+#       You should have received a copy of the GNU General Public License
+#       along with this program; if not, write to the Free Software
+#       Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#       MA 02110-1301, USA.
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+try:
+    import cairo
+    import gtk
+except ImportError:
+    gtk = None
+
+if gtk != None:
+    from pygtk_chart import chart
+    from pygtk_chart import line_chart
+
+
+@unittest.skipIf(gtk == None, "pygtk is not installed")
+class UnsortedFileTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmpdir, "data.txt")
+        self.xs = range(100)
+        random.Random(1).shuffle(self.xs)
+        f = open(self.filename, "w")
+        for x in self.xs:
+            f.write("%d %d %d\n" % (x, 2 * x, 3 * x))
+        f.close()
+        
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        
+    def check_graph(self, graph, factor):
+        points = list(graph._data)
+        self.assertEqual(points, [(x, factor * x) for x in range(100)])
+        self.assertEqual(graph.get_value_at(41.8), factor * 42)
+        self.assertEqual(graph._get_neighbours(10.5, 20.5), (10, 21))
+        graph.add_data([(50.5, 0)])
+        self.assertEqual(list(graph._data)[50:53], [(50, factor * 50), (50.5, 0), (51, factor * 51)])
+        
+    def test_graphs_new_from_file(self):
+        graphs = line_chart.graphs_new_from_file(self.filename, [1, 2])
+        self.check_graph(graphs[0], 2)
+        self.check_graph(graphs[1], 3)
+        
+    def test_graphs_new_from_files(self):
+        graphs, errors = line_chart.graphs_new_from_files([self.filename], processes=1)
+        self.assertEqual(errors, [])
+        self.check_graph(graphs[0], 2)
+        
+    def test_graph_new_from_file(self):
+        self.check_graph(line_chart.graph_new_from_file(self.filename, "g"), 2)
+
+
+
+@unittest.skipIf(gtk == None, "pygtk is not installed")
+class StripChartTest(unittest.TestCase):
+    
+    def test_fractional_steps_are_scrolled(self):
+        c = line_chart.LineChart()
+        c.set_strip_chart(True)
+        graph = line_chart.Graph("g", "", [(0.37 * i, i % 2) for i in range(30)])
+        c.add_graph(graph)
+        c.set_yrange((-1, 2))
+        c.size_allocate(gtk.gdk.Rectangle(0, 0, 400, 300))
+        
+        scrolled = []
+        draw_scrolled = graph.draw_scrolled
+        def draw_scrolled_spy(*args):
+            scrolled.append(args)
+            return draw_scrolled(*args)
+        graph.draw_scrolled = draw_scrolled_spy
+        
+        surface = cairo.ImageSurface(cairo.FORMAT_RGB24, 400, 300)
+        t = 0.37 * 29
+        c.set_xrange((t - 5, t))
+        c._draw_cache(chart.create_context(surface))
+        for i in range(30, 60):
+            t = 0.37 * i
+            graph.add_data([(t, i % 2)])
+            c.set_xrange((t - 5, t))
+            c._draw_cache(chart.create_context(surface))
+            self.assertEqual(len(scrolled), i - 29)
+            self.assertTrue(scrolled[-1][5] > 0)
+
+
+
+def recursive_sampling(func, data):
+    """
+    The recursive optimize_sampling of earlier versions.
+    """
+    new_data = []
+    prev_point = None
+    prev_slope = None
+    for x, y in data:
+        if prev_point != None:
+            if (x - prev_point[0]) == 0: return data
+            slope = (y - prev_point[1]) / (x - prev_point[0])
+            if prev_slope != None:
+                if abs(slope - prev_slope) >= 0.1:
+                    nx = prev_point[0] + (x - prev_point[0]) / 2.0
+                    new_data.append((nx, func(nx)))
+            prev_slope = slope
+        prev_point = x, y
+    if new_data:
+        data += new_data
+        data.sort(lambda x, y: cmp(x[0], y[0]))
+        return recursive_sampling(func, data)
+    return data
+    
+def samples(func, xmin, xmax, n):
+    xs = [xmin + i * (xmax - xmin) / float(n - 1) for i in range(n - 1)] + [xmax]
+    return [(x, func(x)) for x in xs]
+
+
+@unittest.skipIf(gtk == None, "pygtk is not installed")
+class SamplingTest(unittest.TestCase):
+    
+    def test_smooth_functions_match_recursive_sampling(self):
+        cubic = lambda x: x ** 3 - 2 * x
+        for func in (math.sin, cubic):
+            data = samples(func, -3, 3, 100)
+            self.assertEqual(line_chart.optimize_sampling(func, list(data)),
+                                recursive_sampling(func, list(data)))
+                                
+    def test_rounds_are_bounded(self):
+        #the kink of abs is refined until max_rounds is reached
+        data = samples(abs, -3, 3, 100)
+        self.assertEqual(len(line_chart.optimize_sampling(abs, list(data))), 165)
+        result = line_chart.optimize_sampling(abs, list(data), max_rounds=10)
+        self.assertEqual(len(result), 111)
+        widths = [b[0] - a[0] for (a, b) in zip(result, result[1:])]
+        self.assertAlmostEqual(min(widths), 6 / 99.0 / 2 ** 10)
+        
+    def test_points_are_bounded(self):
+        #no new round is started once there are more than max_points
+        #points, the last round may add at most one point per segment
+        data = samples(math.exp, 0, 10, 50)
+        result = line_chart.optimize_sampling(math.exp, list(data), max_points=1000)
+        self.assertEqual(len(result), 1339)
+        self.assertEqual(sorted(result), result)
+        for point in data:
+            self.assertTrue(point in result)
+        
+        
+if __name__ == "__main__":
+    unittest.main()